@@ -1,219 +1,742 @@
 #!/usr/bin/env python3
-# filepath: scripts/convert_all_to_markdown.py
+# filepath: scripts/audio_to_text.py
 
+import itertools
+import json
 import os
+import queue
+import shutil
+import socket
 import subprocess
+import tempfile
+import threading
 import time
+from collections import Counter
 from pathlib import Path
+from typing import NamedTuple
+import numpy as np
 import torch
 import soundfile as sf
 import librosa
 from transformers import WhisperProcessor, WhisperForConditionalGeneration
 
+import convert_all_to_markdown
+
+WHISPER_MODEL = "openai/whisper-large-v3"
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30
+CHUNK_SAMPLES = SAMPLE_RATE * CHUNK_SECONDS
+# 30-second chunks transcribed per `generate` call
+DEFAULT_BATCH_SIZE = 4
+chunk_batch_size = DEFAULT_BATCH_SIZE
+# Silence is skipped unless --no-vad is given
+vad_enabled = True
+vad_threshold_db = -45.0
+vad_totals = Counter()
+# Segments decoded ahead of the model per file; 0 decodes and transcribes in turn
+DEFAULT_PREFETCH_CHUNKS = 8
+prefetch_chunks = DEFAULT_PREFETCH_CHUNKS
+stage_stats = Counter()
+stats_lock = threading.Lock()
+# Per-segment transcripts, see `ChunkCache`; --no-chunk-cache sets the path to None
+DEFAULT_CHUNK_CACHE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "daksh" / "transcripts.sqlite"
+chunk_cache_path = DEFAULT_CHUNK_CACHE
+chunk_cache = None
+
 # Initialize Whisper model globally (only when needed)
 whisper_model = None
 whisper_processor = None
 device = None
+# Set with `configure_whisper`
+whisper_quantize = None
+whisper_threads = None
+whisper_offline = False
+QUANTIZE_MODES = ("int8",)
+# Files are decoded concurrently; the one Whisper model runs one batch at a time
+whisper_lock = threading.Lock()
+# Where `transcribe_daemon.py` listens; it is used whenever it is running unless --no-daemon is given
+use_daemon = True
+SOCKET_PATH = os.environ.get("DAKSH_TRANSCRIBE_SOCKET") or os.path.join(tempfile.gettempdir(), f"daksh-transcribe-{os.getuid()}.sock")
+
+def configure_whisper(model=None, quantize=None, threads=None, offline=None):
+    """Choose the Whisper model and how it runs; the next `initialize_whisper` loads it
+    
+    `model` is a Hugging Face model name (looked up in the local cache
+    first) or the path of a saved model folder. `quantize="int8"` applies
+    dynamic int8 quantization to the linear layers for CPU inference;
+    `threads` sets torch's intra-op thread count. With `offline` the model
+    must already be on disk.
+    """
+    global WHISPER_MODEL, whisper_quantize, whisper_threads, whisper_offline, whisper_model, whisper_processor
+    if quantize not in (None, *QUANTIZE_MODES):
+        raise ValueError(f"quantize must be one of {', '.join(QUANTIZE_MODES)}, got {quantize!r}")
+    WHISPER_MODEL = str(model or WHISPER_MODEL)
+    whisper_quantize = quantize
+    whisper_threads = threads
+    if offline is not None:
+        whisper_offline = offline
+    whisper_model = whisper_processor = None
+
+def load_pretrained(cls, name):
+    """`cls.from_pretrained(name)` from disk, downloading only if allowed and needed"""
+    try:
+        return cls.from_pretrained(name, local_files_only=True)
+    except OSError:
+        if whisper_offline or Path(name).exists():
+            raise
+        print(f"{name} is not in the local cache, downloading it...")
+        return cls.from_pretrained(name)
 
 def initialize_whisper():
     """Initialize the Whisper model for audio transcription"""
     global whisper_model, whisper_processor, device
     
     if whisper_model is None:
-        print("Initializing Whisper model (this may take a moment)...")
-        whisper_processor = WhisperProcessor.from_pretrained("openai/whisper-large-v3")
-        whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-large-v3")
+        print(f"Initializing Whisper model {WHISPER_MODEL} (this may take a moment)...")
+        if whisper_threads:
+            torch.set_num_threads(whisper_threads)
+        whisper_processor = load_pretrained(WhisperProcessor, WHISPER_MODEL)
+        model = load_pretrained(WhisperForConditionalGeneration, WHISPER_MODEL)
         
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {device}")
-        whisper_model.to(device)
-        whisper_model.eval()
+        device = "cuda" if torch.cuda.is_available() and not whisper_quantize else "cpu"
+        print(f"Using device: {device}, {torch.get_num_threads()} threads")
+        model.to(device)
+        model.eval()
+        if whisper_quantize == "int8":
+            # Dynamic quantization only runs on the CPU
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            print("Quantized linear layers to int8")
+        whisper_model = model
         print("Whisper model initialized successfully")
 
 def is_audio_file(file_path):
     """Check if the file is an audio file based on extension"""
-    audio_extensions = ['.mp3', '.wav', '.m4a', '.ogg', '.flac', '.aac', '.wma', '.webm']
-    return file_path.suffix.lower() in audio_extensions
+    return file_path.suffix.lower() in AUDIO_EXTENSIONS
 
-def transcribe_audio(audio_path, output_path):
-    """Transcribe audio file using Whisper model"""
-    try:
-        # Initialize Whisper if not already loaded
-        initialize_whisper()
-        
-        # Create a temporary WAV file if not already a WAV
-        wav_path = audio_path
-        if audio_path.suffix.lower() != '.wav':
-            wav_path = audio_path.parent / f"{audio_path.stem}_temp.wav"
-            
-            # Convert to WAV using ffmpeg
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    str(audio_path),
-                    "-ar",
-                    "16000",
-                    "-ac",
-                    "1",
-                    "-f",
-                    "wav",
-                    str(wav_path),
-                ],
-                check=True,
-                capture_output=True,
-            )
-        
-        # Load and preprocess audio
-        input_audio, sr = sf.read(str(wav_path))
-        if sr != 16000:
-            input_audio = librosa.resample(input_audio, orig_sr=sr, target_sr=16000)
-            sr = 16000
-            
-        # Chunk audio into 30-second segments for Whisper
-        chunk_size = 16000 * 30  # 30 seconds at 16kHz
-        num_chunks = int(len(input_audio) / chunk_size) + (
-            1 if len(input_audio) % chunk_size != 0 else 0
+class PCMStream:
+    """16 kHz mono float32 samples of an audio file, decoded chunk by chunk as they are read
+    
+    ffmpeg decodes and resamples into a pipe that is read straight into a
+    ring of `slots` chunk buffers, so memory use does not depend on the
+    length of the recording and nothing is written to disk. Each chunk
+    yielded is a view into the ring and stays valid until `slots` more
+    chunks have been read. Without ffmpeg, files soundfile can read are
+    decoded block by block instead. `samples` counts what has been read.
+    """
+    
+    def __init__(self, path, chunk_samples=None, slots=2):
+        self.path = Path(path)
+        self.chunk_samples = chunk_samples or CHUNK_SAMPLES
+        self.ring = np.empty((max(slots, 1), self.chunk_samples), dtype=np.float32)
+        self.samples = 0
+    
+    def __iter__(self):
+        self.samples = 0
+        chunks = self.ffmpeg_chunks() if shutil.which("ffmpeg") else self.soundfile_chunks()
+        try:
+            for chunk in chunks:
+                self.samples += len(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+    
+    def ffmpeg_chunks(self):
+        # stderr goes to a file: a pipe nobody reads until stdout ends would
+        # stall ffmpeg once it fills up with warnings
+        errors = tempfile.TemporaryFile()
+        proc = subprocess.Popen(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(self.path),
+                "-ar", str(SAMPLE_RATE), "-ac", "1", "-f", "f32le", "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        )
+        try:
+            for slot in itertools.cycle(range(len(self.ring))):
+                buffer = memoryview(self.ring[slot]).cast("B")
+                filled = 0
+                while filled < len(buffer):
+                    n = proc.stdout.readinto(buffer[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled // 4:
+                    yield self.ring[slot, : filled // 4]
+                if filled < len(buffer):
+                    break
+            if proc.wait() != 0:
+                errors.seek(0)
+                stderr = errors.read().decode(errors="replace")
+                raise RuntimeError(f"ffmpeg could not decode {self.path}: {stderr.strip()}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            errors.close()
+    
+    def soundfile_chunks(self):
+        info = sf.info(str(self.path))
+        # Blocks of the input rate that come out as one chunk after resampling
+        block = self.chunk_samples * info.samplerate // SAMPLE_RATE
+        for slot, data in zip(itertools.cycle(range(len(self.ring))), sf.blocks(str(self.path), blocksize=block, dtype="float32", always_2d=True)):
+            data = data.mean(axis=1)
+            if info.samplerate != SAMPLE_RATE:
+                data = librosa.resample(data, orig_sr=info.samplerate, target_sr=SAMPLE_RATE)
+            size = min(len(data), self.chunk_samples)
+            self.ring[slot, :size] = data[:size]
+            yield self.ring[slot, :size]
+
+class Segment(NamedTuple):
+    start: int  # first sample, counted from the start of the recording
+    audio: np.ndarray
+
+    @property
+    def end(self):
+        return self.start + len(self.audio)
+
+def fixed_segments(stream, copy=False):
+    """The stream's 30-second chunks as they are, silence included
+    
+    With `copy`, chunks are copied out of the stream's ring buffer so they
+    can be held for longer than the ring allows.
+    """
+    start = 0
+    for chunk in stream:
+        yield Segment(start, chunk.copy() if copy else chunk)
+        start += len(chunk)
+
+class Prefetch:
+    """Runs a segment generator on its own thread, up to `size` segments ahead of the consumer
+    
+    This is the decode stage of the pipeline: while one file's batch is on
+    the model, ffmpeg, the segmenter and the next files keep producing into
+    bounded queues. Time spent producing, blocked on a full queue and
+    waiting for an empty one is added to `stage_stats`.
+    """
+    
+    DONE = object()
+    
+    def __init__(self, items, size):
+        self.items = items
+        self.queue = queue.Queue(maxsize=size)
+        self.closed = False
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        self.thread.start()
+    
+    def produce(self):
+        try:
+            items = iter(self.items)
+            while not self.closed:
+                start = time.perf_counter()
+                item = next(items, self.DONE)
+                produced = time.perf_counter()
+                count_stage("decode_busy", produced - start)
+                if item is self.DONE:
+                    break
+                self.queue.put(item)
+                count_stage("decode_blocked", time.perf_counter() - produced)
+        except BaseException as e:
+            self.queue.put(e)
+        finally:
+            self.queue.put(self.DONE)
+            close = getattr(self.items, "close", None)
+            if close:
+                close()
+    
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            item = self.queue.get()
+            count_stage("inference_starved", time.perf_counter() - start)
+            if item is self.DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    
+    def close(self):
+        """Stop the producer, emptying the queue so it is not left blocked"""
+        self.closed = True
+        while self.thread.is_alive():
+            try:
+                self.queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def count_stage(name, seconds):
+    with stats_lock:
+        stage_stats[name] += seconds
+
+def count_vad(**counts):
+    with stats_lock:
+        vad_totals.update(counts)
+
+def print_stage_stats(wall_seconds, decode_workers):
+    """How busy each pipeline stage was over a run"""
+    if not stage_stats["inference_busy"]:
+        return
+    capacity = wall_seconds * max(decode_workers, 1)
+    print(f"\nPipeline over {wall_seconds:.1f}s:")
+    if stage_stats["decode_busy"]:
+        print(
+            f"- Decode ({decode_workers} workers): {stage_stats['decode_busy'] / capacity:.0%} busy,"
+            f" {stage_stats['decode_blocked'] / capacity:.0%} blocked on a full queue"
         )
+    print(
+        f"- Inference: {stage_stats['inference_busy'] / wall_seconds:.0%} busy,"
+        f" {stage_stats['inference_starved']:.1f}s waiting for decoded audio"
+    )
+
+class SpeechSegmenter:
+    """Energy-based voice activity detection that turns a PCM stream into speech segments
+    
+    The audio is scored in 30 ms frames: a frame is speech when it is louder
+    than `threshold_db` (dBFS) and clearly above the recording's noise floor.
+    The floor is the 10th percentile level of every frame seen so far, and
+    only counts once the recording shows distinct quiet and loud frames, so
+    audio without pauses is never taken for noise.
+    Segments start just before speech, are at most 30 seconds long, and end
+    in the last pause of at least `min_silence` seconds that fits, so words
+    are not cut in half; silence between segments is never transcribed.
+    Only up to two chunks of audio are buffered at a time.
+    """
+    
+    FRAME = SAMPLE_RATE * 30 // 1000
+    # Frame levels are kept in a histogram of 0.5 dB bins from LEVEL_MIN dBFS up
+    LEVEL_MIN = -120
+    LEVEL_BINS = 2 * 140
+    # The floor is trusted when the loudest 10% of frames are this much above it
+    CONTRAST_DB = 12
+    # ... and raises the threshold by at most this much
+    MAX_RAISE_DB = 30
+    
+    def __init__(self, threshold_db=-45.0, min_silence=0.5, pad=0.2, max_seconds=CHUNK_SECONDS):
+        self.threshold_db = threshold_db
+        self.min_silence = max(1, int(min_silence * SAMPLE_RATE / self.FRAME))
+        self.pad = int(pad * SAMPLE_RATE / self.FRAME)
+        self.max_frames = max_seconds * SAMPLE_RATE // self.FRAME
+        self.total_samples = 0
+        self.speech_samples = 0
+        self.segments = 0
+        self.levels = np.zeros(self.LEVEL_BINS, dtype=np.int64)
+    
+    def frame_db(self, audio):
+        frames = len(audio) // self.FRAME
+        rms = np.sqrt(np.mean(np.square(audio[: frames * self.FRAME].reshape(frames, self.FRAME)), axis=1))
+        return 20 * np.log10(rms + 1e-10)
+    
+    def observe(self, audio):
+        """Add the levels of the complete frames of `audio` to the recording's histogram"""
+        bins = ((self.frame_db(audio) - self.LEVEL_MIN) * 2).astype(np.int64)
+        self.levels += np.bincount(np.clip(bins, 0, self.LEVEL_BINS - 1), minlength=self.LEVEL_BINS)
+    
+    def level_percentile(self, q):
+        counts = np.cumsum(self.levels)
+        return self.LEVEL_MIN + np.searchsorted(counts, counts[-1] * q / 100) / 2
+    
+    def speech_threshold(self):
+        """The level a frame must exceed to be speech, given the frames seen so far"""
+        if not self.levels.any():
+            return self.threshold_db
+        floor = self.level_percentile(10)
+        if self.level_percentile(90) - floor < self.CONTRAST_DB:
+            return self.threshold_db
+        return min(max(self.threshold_db, floor + 6), self.threshold_db + self.MAX_RAISE_DB)
+    
+    def __call__(self, stream):
+        buffer = np.empty(0, dtype=np.float32)
+        offset = 0  # sample number of buffer[0]
+        observed = 0  # samples whose frames are in the level histogram
+        for chunk in itertools.chain(stream, [None]):
+            final = chunk is None
+            if not final:
+                self.total_samples += len(chunk)
+                buffer = np.concatenate([buffer, chunk])
+                frames_end = (offset + len(buffer)) // self.FRAME * self.FRAME
+                self.observe(buffer[observed - offset : frames_end - offset])
+                observed = frames_end
+            while True:
+                start, end, consumed = self.next_segment(buffer, final)
+                if end > start:
+                    self.segments += 1
+                    self.speech_samples += end - start
+                    yield Segment(offset + start, buffer[start:end].copy())
+                buffer = buffer[consumed:]
+                offset += consumed
+                if end <= start:
+                    break
+    
+    def next_segment(self, buffer, final):
+        """`(start, end, consumed)` sample positions of the next segment in `buffer`
         
-        print(f"Transcribing {num_chunks} chunks from audio file...")
-        transcripts = []
-        for i in range(num_chunks):
-            print(f"Processing chunk {i+1}/{num_chunks}...")
-            chunk = input_audio[i * chunk_size : (i + 1) * chunk_size]
-            inputs = whisper_processor(chunk, sampling_rate=16000, return_tensors="pt").to(device)
+        `end <= start` means there is no complete segment yet; `consumed`
+        samples at the front of `buffer` can be dropped either way.
+        """
+        F = self.FRAME
+        if final and len(buffer) % F:
+            buffer = np.concatenate([buffer, np.zeros(F - len(buffer) % F, dtype=np.float32)])
+        db = self.frame_db(buffer)
+        if not len(db):
+            return 0, 0, 0
+        speech = db > self.speech_threshold()
+        voiced = np.flatnonzero(speech)
+        if not len(voiced):
+            # Keep the tail, which may hold the padding before the next speech
+            keep = 0 if final else self.pad
+            return 0, 0, max(0, len(db) - keep) * F
+        first = max(0, voiced[0] - self.pad)
+        window_end = first + self.max_frames
+        if not final and len(db) < window_end:
+            return 0, 0, int(first) * F
+        window = speech[first:window_end]
+        # Pauses: runs of at least `min_silence` quiet frames after the first voiced frame
+        quiet = np.concatenate([[False], ~window, [False]])
+        edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+        runs = [(a, b) for a, b in zip(edges[::2], edges[1::2]) if b - a >= self.min_silence and a > 0]
+        if runs:
+            a, b = runs[-1]
+            end = first + min(a + self.pad, b)
+        elif final and len(db) <= window_end:
+            end = min(len(db), voiced[-1] + 1 + self.pad)
+        else:
+            # No pause fits: cut at the quietest frame of the last 5 seconds
+            tail = max(1, len(window) - 5 * SAMPLE_RATE // F)
+            end = first + tail + int(np.argmin(db[first + tail : first + len(window)])) + 1
+        end_sample = int(min(end * F, len(buffer)))
+        return int(first) * F, end_sample, end_sample
+    
+    def report(self, label=""):
+        skipped = self.total_samples - self.speech_samples
+        share = skipped / self.total_samples if self.total_samples else 0
+        print(
+            f"VAD{label}: transcribed {self.speech_samples / SAMPLE_RATE:.1f}s of {self.total_samples / SAMPLE_RATE:.1f}s"
+            f" in {self.segments} segments, skipped {skipped / SAMPLE_RATE:.1f}s of silence ({share:.0%})"
+        )
+
+def batched(iterable, n):
+    """Lists of up to `n` consecutive items from `iterable`"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, n))
+        if not batch:
+            return
+        yield batch
+
+def transcribe_chunks(chunks, batch_size=None, total=None, done=0):
+    """Transcribe 16 kHz audio chunks of up to 30 seconds, `batch_size` at a time, in order
+    
+    The feature extractor pads every chunk (including a short last one) to
+    the 30-second window Whisper expects, so a batch is one tensor and one
+    `generate` call.
+    """
+    batch_size = batch_size or chunk_batch_size
+    for batch in batched(chunks, batch_size):
+        print(f"Processing chunks {done + 1}-{done + len(batch)}{f'/{total}' if total else ''}...")
+        # Only the model is shared: other files keep decoding while this batch runs
+        with whisper_lock:
+            start = time.perf_counter()
+            initialize_whisper()
+            inputs = whisper_processor(
+                [np.asarray(chunk, dtype=np.float32) for chunk in batch],
+                sampling_rate=SAMPLE_RATE,
+                padding="max_length",
+                return_attention_mask=True,
+                return_tensors="pt",
+            ).to(device)
             with torch.no_grad():
-                predicted_ids = whisper_model.generate(inputs["input_features"])
-                transcription = whisper_processor.batch_decode(
-                    predicted_ids, skip_special_tokens=True
-                )[0]
-            transcripts.append(transcription)
-        
-        # Combine all transcriptions
-        full_transcript = " ".join(transcripts)
-        
-        # Create a markdown file with the transcript
-        markdown_content = f"""# Audio Transcript: {audio_path.stem}
+                predicted_ids = whisper_model.generate(
+                    inputs["input_features"], attention_mask=inputs["attention_mask"]
+                )
+            texts = whisper_processor.batch_decode(predicted_ids, skip_special_tokens=True)
+            count_stage("inference_busy", time.perf_counter() - start)
+        yield from texts
+        done += len(batch)
+
+class ChunkCache(convert_all_to_markdown.ConversionCache):
+    """Transcripts of single audio segments, so an interrupted recording resumes where it stopped
+    
+    A segment is identified by the hash of the audio file, its first and
+    last sample and `whisper_model_id()`. Segmentation is deterministic, so
+    a rerun finds the same segments and only transcribes the missing ones.
+    Once a file has been transcribed completely, its segments from other
+    model configurations are dropped.
+    """
+    
+    def __init__(self, db_path):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(db_path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (audio TEXT, start INTEGER, end INTEGER, model TEXT, text TEXT,"
+            " PRIMARY KEY (audio, start, end, model))"
+        )
+    
+    def get(self, audio_sha, start, end, model):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT text FROM chunks WHERE audio = ? AND start = ? AND end = ? AND model = ?",
+                (audio_sha, start, end, model),
+            ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, rows):
+        """Store `(audio_sha, start, end, model, text)` rows in one transaction"""
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.execute("COMMIT")
+    
+    def forget_other_models(self, audio_sha, model):
+        with self.lock:
+            self.db.execute("DELETE FROM chunks WHERE audio = ? AND model != ?", (audio_sha, model))
+
+def open_chunk_cache():
+    """The shared `ChunkCache`, opened on first use; None when it is turned off"""
+    global chunk_cache
+    with stats_lock:
+        if chunk_cache is None and chunk_cache_path:
+            chunk_cache = ChunkCache(chunk_cache_path)
+        return chunk_cache
+
+def transcribe_segments(segments, audio_sha=None, batch_size=None):
+    """Yield `(start, end, text)` for each segment in order, transcribing only those not in the chunk cache
+    
+    Cached segments are passed through without touching the model; missing
+    ones are batched and stored as soon as each batch is done.
+    """
+    batch_size = batch_size or chunk_batch_size
+    cache = open_chunk_cache() if audio_sha else None
+    model = whisper_model_id()
+    pending = []  # [start, end, text or None, audio or None], in order
+    misses = []
+    reused = transcribed = 0
+    
+    def flush():
+        nonlocal transcribed
+        texts = transcribe_chunks([item[3] for item in misses], len(misses), done=transcribed)
+        transcribed += len(misses)
+        for item, text in zip(misses, texts):
+            item[2], item[3] = text, None
+        if cache:
+            cache.put([(audio_sha, start, end, model, text) for start, end, text, _ in misses])
+        misses.clear()
+        for start, end, text, _ in pending:
+            yield start, end, text
+        pending.clear()
+    
+    for segment in segments:
+        text = cache.get(audio_sha, segment.start, segment.end, model) if cache else None
+        if text is not None:
+            reused += 1
+            if not pending:
+                yield segment.start, segment.end, text
+                continue
+            pending.append([segment.start, segment.end, text, None])
+        else:
+            # A miss can wait for its batch while cache hits keep advancing the
+            # stream, so it must not stay a view into the stream's ring buffer
+            item = [segment.start, segment.end, None, segment.audio.copy() if cache else segment.audio]
+            pending.append(item)
+            misses.append(item)
+            if len(misses) >= batch_size:
+                yield from flush()
+    yield from flush()
+    if reused:
+        print(f"Reused {reused} cached chunk transcripts")
+
+# Bumped when the transcript markdown changes, so cached conversions are redone
+TRANSCRIPT_FORMAT = "2"
+DURATION_PENDING = "(transcribing...)"
+
+def transcript_header(audio_path, duration):
+    return f"""# Audio Transcript: {audio_path.stem}
 
 ## Overview
 - **File:** {audio_path.name}
-- **Duration:** {len(input_audio)/sr:.2f} seconds
+- **Duration:** {duration}
 - **Transcription Date:** {time.strftime("%Y-%m-%d")}
 
 ## Transcript
 
-{full_transcript}
 """
+
+def timestamp(sample):
+    seconds = int(sample // SAMPLE_RATE)
+    return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def set_duration(transcript_path, duration, output_path=None):
+    """Copy a finished transcript line by line to `output_path` (default: in place), filling in the pending Duration"""
+    output_path = output_path or transcript_path
+    tmp = output_path.with_name(f".{output_path.name}.tmp")
+    pending = f"- **Duration:** {DURATION_PENDING}\n"
+    with open(transcript_path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dest:
+        for line in src:
+            if line == pending:
+                line = f"- **Duration:** {duration}\n"
+                pending = None
+            dest.write(line)
+    os.replace(tmp, output_path)
+    if output_path != transcript_path:
+        os.unlink(transcript_path)
+
+def partial_path(output_path):
+    """Where a transcript is written until it is finished"""
+    return output_path.with_name(f".{output_path.name}.partial")
+
+def transcribe_audio(audio_path, output_path, batch_size=None):
+    """Transcribe audio file using Whisper model
+    
+    The header is written first and each segment is appended with its
+    start and end time as soon as it is transcribed, to the hidden
+    `partial_path` next to the output. Once the whole recording has been
+    decoded the Duration is filled in and the transcript moved into place,
+    so `output_path` never holds an unfinished transcript; after a failure
+    the partial one is left behind for inspection.
+    """
+    segments = None
+    try:
+        with whisper_lock:
+            # Initialize Whisper if not already loaded
+            initialize_whisper()
+        
+        # Decode and transcribe up to 30 seconds at a time as they are needed
+        stream = PCMStream(audio_path, slots=batch_size or chunk_batch_size)
+        if vad_enabled:
+            print(f"Transcribing the speech in {audio_path}...")
+            segmenter = SpeechSegmenter(vad_threshold_db)
+            segments = segmenter(stream)
+        else:
+            print(f"Transcribing {audio_path} in {CHUNK_SECONDS}-second chunks...")
+            segments = fixed_segments(stream, copy=prefetch_chunks > 0)
+        if prefetch_chunks > 0:
+            segments = Prefetch(segments, prefetch_chunks)
+        cache = open_chunk_cache()
+        audio_sha = cache.file_hash(audio_path) if cache else None
+        partial = partial_path(Path(output_path))
         
-        # Write to output file
-        output_path.write_text(markdown_content, encoding='utf-8')
+        # Write the markdown as segments are transcribed, so progress is visible and survives a crash
+        with open(partial, "w", encoding="utf-8") as out:
+            out.write(transcript_header(audio_path, DURATION_PENDING))
+            out.flush()
+            for start, end, text in transcribe_segments(segments, audio_sha, batch_size):
+                if text.strip():
+                    out.write(f"**[{timestamp(start)} - {timestamp(end)}]** {text.strip()}\n\n")
+                    out.flush()
+        if cache:
+            cache.forget_other_models(audio_sha, whisper_model_id())
+        if vad_enabled:
+            segmenter.report(f" {audio_path.name}")
+            count_vad(files=1, total=segmenter.total_samples, speech=segmenter.speech_samples, segments=segmenter.segments)
+        
+        # Only now is the length of the recording known
+        set_duration(partial, f"{stream.samples / SAMPLE_RATE:.2f} seconds", Path(output_path))
         
-        # Clean up temporary file if created
-        if wav_path != audio_path and wav_path.exists():
-            wav_path.unlink()
-            
         return True
     
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
-        return False
+        return convert_all_to_markdown.conversion_failed(f"Error transcribing audio: {e}")
+    finally:
+        if isinstance(segments, Prefetch):
+            segments.close()
 
-def convert_to_markdown(input_path, output_folder=None):
-    """Convert a file to markdown using appropriate method based on file type"""
-    
-    input_path = Path(input_path)
-    
-    if not input_path.exists():
-        print(f"File not found: {input_path}")
-        return False
-        
-    # Create output path - either in same folder or specified output folder
-    if output_folder:
-        output_path = Path(output_folder) / f"{input_path.stem}.md"
-        os.makedirs(output_folder, exist_ok=True)
-    else:
-        output_path = input_path.parent / f"{input_path.stem}.md"
-    
-    # Skip if output already exists to avoid errors
-    if output_path.exists():
-        print(f"Output already exists, skipping: {output_path}")
-        return True
+def whisper_model_id():
+    """The model and everything that changes what it outputs for a given chunk"""
+    quantize = whisper_quantize or "none"
+    return f"whisper/{WHISPER_MODEL},transformers={convert_all_to_markdown.package_version('transformers')},quantize={quantize}"
+
+def whisper_id():
+    """Identity of the audio converter, part of every conversion cache key"""
+    vad = f"{vad_threshold_db:g}dB" if vad_enabled else "off"
+    return f"{whisper_model_id()},vad={vad},transcript={TRANSCRIPT_FORMAT}"
+
+def daemon_request(request, socket_path=None, timeout=None):
+    """Send one JSON request to the transcription daemon and return its reply
     
-    # Check if it's an audio file
-    if is_audio_file(input_path):
-        print(f"Detected audio file: {input_path}")
-        return transcribe_audio(input_path, output_path)
-    else:
-        # Use markitdown (ts mkd) for non-audio files
+    Raises OSError when no daemon is listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path or SOCKET_PATH))
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+            reply = stream.readline()
+    if not reply:
+        raise ConnectionError("transcription daemon closed the connection")
+    return json.loads(reply)
+
+def transcribe_file(audio_path, output_path):
+    """Transcribe with the daemon when one is running with the same settings, otherwise in this process"""
+    if use_daemon and os.path.exists(SOCKET_PATH):
         try:
-            cmd = ["ts", "mkd", str(input_path), "--output", str(output_path)]
-            print(f"Running: {' '.join(cmd)}")
-            
-            # Run the command
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"Successfully converted: {input_path} → {output_path}")
-                return True
-            else:
-                print(f"Error converting {input_path}: {result.stderr}")
-                return False
-        except Exception as e:
-            print(f"Exception while converting {input_path}: {e}")
-            return False
-
-def process_directory(root_path, output_root=None):
-    """Process all files in a directory and its subdirectories"""
-    
-    root_path = Path(root_path)
-    converted_count = 0
-    error_count = 0
-    
-    # Create parallel output structure if specified
-    if output_root:
-        output_root = Path(output_root)
-        os.makedirs(output_root, exist_ok=True)
-    
-    # Get all files in the directory and subdirectories
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        current_dir = Path(dirpath)
-        
-        # Create corresponding output directory if needed
-        if output_root:
-            rel_path = current_dir.relative_to(root_path)
-            current_output_dir = output_root / rel_path
-            os.makedirs(current_output_dir, exist_ok=True)
+            reply = daemon_request(
+                {"op": "transcribe", "input": os.path.abspath(audio_path), "output": os.path.abspath(output_path), "id": whisper_id()}
+            )
+        except OSError as e:
+            print(f"Transcription daemon at {SOCKET_PATH} is not answering ({e}), transcribing here")
         else:
-            current_output_dir = None
-            
-        print(f"\nProcessing directory: {current_dir}")
-        
-        # Process each file
-        for filename in filenames:
-            file_path = current_dir / filename
-            
-            # Skip if already a markdown file
-            if file_path.suffix.lower() == ".md":
-                print(f"Skipping existing markdown file: {file_path}")
-                continue
-                
-            # Skip hidden files
-            if filename.startswith("."):
-                continue
-                
-            print(f"Converting: {file_path}")
-            success = convert_to_markdown(file_path, current_output_dir)
-            
-            if success:
-                converted_count += 1
+            if reply.get("mismatch"):
+                print(f"Transcription daemon runs {reply['id']}, transcribing here with {whisper_id()}")
+            elif reply["ok"]:
+                print(f"Transcribed by daemon in {reply['seconds']:.2f}s (queued {reply['waited']:.2f}s): {audio_path}")
+                return True
             else:
-                error_count += 1
-                
-            # Small delay to avoid overwhelming the system
-            time.sleep(0.5)
+                return convert_all_to_markdown.conversion_failed(reply["error"])
+    return transcribe_audio(audio_path, output_path)
+
+# Audio files go to Whisper; everything else keeps the converters registered by convert_all_to_markdown
+AUDIO_EXTENSIONS = ['.mp3', '.wav', '.m4a', '.ogg', '.flac', '.aac', '.wma', '.webm']
+convert_all_to_markdown.register_converter("audio", AUDIO_EXTENSIONS, whisper_id)(transcribe_file)
+
+def convert_to_markdown(input_path, output_folder=None, output_name=None, cache=None):
+    """Convert a file to markdown using appropriate method based on file type"""
+    if is_audio_file(Path(input_path)):
+        print(f"Detected audio file: {input_path}")
+    return convert_all_to_markdown.convert_to_markdown(input_path, output_folder, output_name, cache)
+
+def process_directory(root_path, output_root=None, jobs=None, use_cache=True, resume=False, retry_failed=False):
+    """Process all files in a directory and its subdirectories
     
-    return converted_count, error_count
+    Up to `jobs` files are decoded at once, each `prefetch_chunks` segments
+    ahead of the one Whisper model, which takes batches from whichever
+    file is ready.
+    """
+    start = time.perf_counter()
+    result = convert_all_to_markdown.process_directory(
+        root_path, output_root, jobs=jobs, convert=convert_to_markdown, use_cache=use_cache,
+        resume=resume, retry_failed=retry_failed,
+    )
+    print_stage_stats(time.perf_counter() - start, jobs or convert_all_to_markdown.DEFAULT_JOBS)
+    if vad_totals["files"]:
+        skipped = vad_totals["total"] - vad_totals["speech"]
+        print(
+            f"\nVAD: {vad_totals['files']} recordings, {vad_totals['total'] / SAMPLE_RATE:.1f}s of audio,"
+            f" {skipped / SAMPLE_RATE:.1f}s ({skipped / vad_totals['total']:.0%}) of silence skipped"
+        )
+    return result
+
+def add_whisper_arguments(parser):
+    """Command line options for the model and how audio is chunked, shared with `transcribe_daemon.py`"""
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help=f"30-second audio chunks transcribed together (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe every 30 seconds of audio, silence included")
+    parser.add_argument("--vad-threshold-db", type=float, default=-45.0, help="Frames quieter than this many dBFS count as silence (default: -45)")
+    parser.add_argument("--model", default=WHISPER_MODEL, help=f"Whisper model name or local model folder (default: {WHISPER_MODEL})")
+    parser.add_argument("--quantize", choices=QUANTIZE_MODES, help="Quantize the model for faster CPU inference")
+    parser.add_argument("--threads", type=int, help="Number of CPU threads for inference (default: torch's choice)")
+    parser.add_argument("--offline", action="store_true", help="Never download the model; it must be in a local folder or the cache")
+    parser.add_argument("--chunk-cache", default=str(DEFAULT_CHUNK_CACHE), help=f"Database of per-chunk transcripts that lets interrupted recordings resume (default: {DEFAULT_CHUNK_CACHE})")
+    parser.add_argument("--no-chunk-cache", action="store_true", help="Do not read or store per-chunk transcripts")
+    parser.add_argument("--prefetch-chunks", type=int, default=DEFAULT_PREFETCH_CHUNKS, help=f"Audio segments decoded ahead of the model per file, 0 to decode and transcribe in turn (default: {DEFAULT_PREFETCH_CHUNKS})")
+
+def apply_whisper_arguments(args):
+    global chunk_batch_size, vad_enabled, vad_threshold_db, prefetch_chunks, chunk_cache_path
+    prefetch_chunks = args.prefetch_chunks
+    chunk_cache_path = None if args.no_chunk_cache else args.chunk_cache
+    configure_whisper(args.model, args.quantize, args.threads, args.offline)
+    chunk_batch_size = args.batch_size
+    vad_enabled = not args.no_vad
+    vad_threshold_db = args.vad_threshold_db
 
 if __name__ == "__main__":
     import argparse
@@ -222,13 +745,24 @@ if __name__ == "__main__":
     parser.add_argument("input_dir", help="Directory containing files to convert")
     parser.add_argument("--output", help="Output directory for markdown files (optional)")
     parser.add_argument("--skip-audio", action="store_true", help="Skip audio file transcription")
+    parser.add_argument("--no-cache", action="store_true", help="Convert every file, ignoring the conversion cache")
+    parser.add_argument("--resume", action="store_true", help="Skip files the job journal already has as converted")
+    parser.add_argument("--retry-failed", action="store_true", help="Only convert the files that failed in earlier runs")
+    parser.add_argument("--jobs", type=int, default=convert_all_to_markdown.DEFAULT_JOBS, help="Maximum number of files converted at once")
+    parser.add_argument("--no-daemon", action="store_true", help="Load the model in this process even if a transcription daemon is running")
+    add_whisper_arguments(parser)
     args = parser.parse_args()
+    apply_whisper_arguments(args)
+    use_daemon = not args.no_daemon
     
     print(f"Starting conversion of all files in: {args.input_dir}")
     if args.output:
         print(f"Output directory: {args.output}")
     
-    converted, errors = process_directory(args.input_dir, args.output)
+    converted, errors = process_directory(
+        args.input_dir, args.output, jobs=args.jobs, use_cache=not args.no_cache,
+        resume=args.resume, retry_failed=args.retry_failed,
+    )
     
     print(f"\nConversion complete:")
     print(f"- Successfully converted: {converted} files")
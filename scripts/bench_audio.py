@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# filepath: scripts/bench_audio.py
+"""CPU benchmark of Whisper transcription in `audio_to_text.py` across configurations
+
+    python scripts/bench_audio.py r.m4a --batch-sizes 1,2,4,8
+    python scripts/bench_audio.py r.m4a --models openai/whisper-small,openai/whisper-large-v3 --quantize none,int8 --threads 4,8
+
+Every combination of model, quantization, thread count and batch size runs
+in a fresh process, so load time and peak memory are measured on their own.
+Models are only loaded from disk (a folder or the Hugging Face cache).
+Without an audio file, random noise is transcribed instead (fine for
+timing, meaningless as text).
+"""
+
+import os
+
+# Benchmark the CPU path even on machines with a GPU
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import argparse
+import hashlib
+import itertools
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import audio_to_text
+
+SAMPLE_RATE = audio_to_text.SAMPLE_RATE
+CHUNK = audio_to_text.CHUNK_SAMPLES
+RUN_FLAG = "--run-config"
+
+
+def load_chunks(audio_path, count):
+    """`count` 30-second chunks of `audio_path`, repeating it as needed"""
+    if audio_path:
+        audio = np.concatenate([chunk.copy() for chunk in audio_to_text.PCMStream(audio_path)])
+    else:
+        audio = np.random.default_rng(0).standard_normal(CHUNK).astype(np.float32) * 0.1
+    audio = np.resize(audio, CHUNK * count - CHUNK // 2)  # the last chunk is a partial one
+    return [audio[i : i + CHUNK] for i in range(0, len(audio), CHUNK)]
+
+
+def run(chunks, batch_size):
+    start = time.perf_counter()
+    texts = list(audio_to_text.transcribe_chunks(chunks, batch_size, len(chunks)))
+    return time.perf_counter() - start, texts
+
+
+def run_config(config):
+    """Measure one configuration in this process and print the result as JSON"""
+    chunks = load_chunks(config["audio"], config["chunks"])
+    start = time.perf_counter()
+    audio_to_text.configure_whisper(config["model"], config["quantize"], config["threads"], offline=True)
+    audio_to_text.initialize_whisper()
+    load_seconds = time.perf_counter() - start
+
+    # Warm up so the measurement does not pay for lazy initialisation
+    run(chunks[:1], 1)
+    seconds, texts = run(chunks, config["batch_size"])
+    audio_seconds = sum(len(c) for c in chunks) / SAMPLE_RATE
+    result = dict(
+        config,
+        load_seconds=load_seconds,
+        seconds=seconds,
+        rtf=seconds / audio_seconds,
+        peak_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        text_sha=hashlib.sha256("\n".join(texts).encode()).hexdigest(),
+    )
+    print(json.dumps(result))
+
+
+def split(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == [RUN_FLAG]:
+        run_config(json.loads(sys.argv[2]))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Compare Whisper configurations on the CPU")
+    parser.add_argument("audio", nargs="?", help="Audio file to transcribe (default: random noise)")
+    parser.add_argument("--chunks", type=int, default=8, help="Number of 30-second chunks per run")
+    parser.add_argument("--models", default=audio_to_text.WHISPER_MODEL, help="Comma-separated model names or folders")
+    parser.add_argument("--quantize", default="none", help="Comma-separated quantization modes to try (none, int8)")
+    parser.add_argument("--threads", default=str(audio_to_text.torch.get_num_threads()), help="Comma-separated thread counts to try")
+    parser.add_argument("--batch-sizes", default="1,2,4,8", help="Comma-separated batch sizes to try")
+    args = parser.parse_args()
+
+    configs = [
+        dict(
+            audio=args.audio, chunks=args.chunks, model=model, quantize=None if quantize == "none" else quantize,
+            threads=threads, batch_size=batch_size,
+        )
+        for model, quantize, threads, batch_size in itertools.product(
+            split(args.models), split(args.quantize), split(args.threads, int), split(args.batch_sizes, int)
+        )
+    ]
+    print(f"Benchmarking {len(configs)} configurations on {args.chunks} chunks of {args.audio or 'noise'}")
+
+    results = []
+    for config in configs:
+        label = f"{config['model']} quantize={config['quantize'] or 'none'} threads={config['threads']} batch={config['batch_size']}"
+        print(f"- {label}", flush=True)
+        proc = subprocess.run(
+            [sys.executable, __file__, RUN_FLAG, json.dumps(config)], capture_output=True, text=True
+        )
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"  failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    # Transcripts are compared with the first configuration of the same model
+    reference = {}
+    print(f"\n{'Model':<28} {'Quant':>5} {'Thr':>3} {'Batch':>5} {'Load s':>7} {'Seconds':>8} {'RTF':>7} {'Peak MB':>8}  Same text")
+    for r in results:
+        same = reference.setdefault(r["model"], r["text_sha"]) == r["text_sha"]
+        print(
+            f"{r['model'][-28:]:<28} {r['quantize'] or 'none':>5} {r['threads']:>3} {r['batch_size']:>5}"
+            f" {r['load_seconds']:>7.2f} {r['seconds']:>8.2f} {r['rtf']:>7.3f} {r['peak_mb']:>8.0f}  {'yes' if same else 'no'}"
+        )
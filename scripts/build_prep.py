@@ -1,11 +1,49 @@
 #!/usr/bin/env python3
 """Build script to copy assets before packaging"""
 
+import filecmp
+import importlib.util
 import shutil
 import sys
 from pathlib import Path
 
 
+def load_bundle_module(root_dir):
+    """Import `daksh.bundle` from its file without importing the package (and typer)."""
+    path = root_dir / "src" / "daksh" / "bundle.py"
+    spec = importlib.util.spec_from_file_location("daksh_bundle", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def sync_tree(src, dest):
+    """Mirror `src` into `dest`, copying only new or changed files and removing stale ones"""
+    copied, removed = [], []
+    wanted = set()
+    for f in sorted(src.rglob("*")):
+        if not f.is_file():
+            continue
+        rel = f.relative_to(src)
+        wanted.add(rel)
+        to = dest / rel
+        if to.is_file() and filecmp.cmp(f, to, shallow=False):
+            continue
+        to.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(f, to)
+        copied.append(rel)
+
+    if dest.exists():
+        for f in sorted(dest.rglob("*"), reverse=True):
+            if f.is_file() and f.relative_to(dest) not in wanted:
+                f.unlink()
+                removed.append(f.relative_to(dest))
+            elif f.is_dir() and not any(f.iterdir()):
+                f.rmdir()
+    return copied, removed
+
+
 def copy_assets():
     """Copy assets from root to src/daksh/ before building"""
     script_dir = Path(__file__).parent
@@ -15,25 +53,29 @@ def copy_assets():
 
     print("🔧 Preparing package build...")
 
-    # Remove existing assets if they exist
-    if assets_dest.exists():
-        shutil.rmtree(assets_dest)
-        print(f"   Removed existing assets from {assets_dest}")
-
-    # Copy assets
-    if assets_src.exists():
-        shutil.copytree(assets_src, assets_dest)
-        print(f"✅ Copied assets from {assets_src} to {assets_dest}")
-
-        # List what was copied
-        copied_items = list(assets_dest.iterdir())
-        print(f"   Copied {len(copied_items)} items:")
-        for item in sorted(copied_items):
-            print(f"     - {item.name}")
-    else:
+    if not assets_src.exists():
         print(f"❌ Error: Assets directory not found at {assets_src}")
         sys.exit(1)
 
+    # Copy assets, skipping files that are already up to date
+    copied, removed = sync_tree(assets_src, assets_dest)
+    if copied or removed:
+        print(f"✅ Synced assets from {assets_src} to {assets_dest}")
+        for rel in copied:
+            print(f"     + {rel}")
+        for rel in removed:
+            print(f"     - {rel}")
+    else:
+        print(f"✅ Assets in {assets_dest} are up to date")
+
+    # Pack the assets into a single indexed bundle read by `update-prompts`
+    bundle = load_bundle_module(root_dir)
+    bundle_path = assets_dest.parent / bundle.BUNDLE_NAME
+    if bundle.write_bundle(assets_dest, bundle_path):
+        print(f"📦 Wrote asset bundle {bundle_path} ({bundle_path.stat().st_size} bytes)")
+    else:
+        print(f"📦 Asset bundle {bundle_path} is up to date")
+
 
 def cleanup_assets():
     """Remove copied assets after build (optional cleanup)"""
@@ -44,11 +86,13 @@ def cleanup_assets():
     if assets_dest.exists():
         shutil.rmtree(assets_dest)
         print(f"🧹 Cleaned up copied assets from {assets_dest}")
+    bundle_path = assets_dest.parent / "assets.pack"
+    if bundle_path.exists():
+        bundle_path.unlink()
+        print(f"🧹 Removed asset bundle {bundle_path}")
 
 
 if __name__ == "__main__":
-    import sys
-
     if len(sys.argv) > 1 and sys.argv[1] == "cleanup":
         cleanup_assets()
     else:
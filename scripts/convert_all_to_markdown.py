@@ -1,33 +1,196 @@
 #!/usr/bin/env python3
 # filepath: scripts/convert_all_to_markdown.py
 
+import contextlib
+import hashlib
+import importlib.metadata
+import importlib.util
+import io
+import json
+import mimetypes
 import os
+import queue
+import resource
+import shutil
+import sqlite3
 import subprocess
+import sys
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
-def convert_to_markdown(input_path, output_folder=None):
-    """Convert a file to markdown using ts mkd command"""
+import markdown_converters
+
+DEFAULT_JOBS = os.cpu_count() or 1
+# Conversion state of runs without an output folder, kept out of the tree being converted
+STATE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "daksh" / "convert"
+
+class ConversionCache:
+    """Content-addressed index of finished conversions, kept in SQLite
     
-    input_path = Path(input_path)
+    A conversion is identified by the hash of the input's bytes, the
+    converter (name and version) and its options. Reruns skip inputs whose
+    key already produced the current output, reconvert inputs that changed,
+    and copy the output of an identical file converted elsewhere instead of
+    converting it again. Input hashes are memoised by size and mtime so
+    unchanged files are not re-read.
+    """
+
+    FILENAME = ".daksh-convert.sqlite"
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outputs (output TEXT PRIMARY KEY, key TEXT, size INTEGER, mtime_ns INTEGER)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS outputs_key ON outputs (key)")
+
+    def file_hash(self, path):
+        st = path.stat()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT sha256 FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (os.path.abspath(path), st.st_size, st.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        sha = digest.hexdigest()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (os.path.abspath(path), st.st_size, st.st_mtime_ns, sha),
+            )
+        return sha
+
+    def key(self, input_path, converter, options=None):
+        ident = [self.file_hash(input_path), converter, options or {}]
+        return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()
+
+    def is_fresh(self, key, output_path):
+        """Whether `output_path` holds the untouched result of conversion `key`"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size, mtime_ns FROM outputs WHERE output = ? AND key = ?",
+                (os.path.abspath(output_path), key),
+            ).fetchone()
+        return row is not None and output_stat(output_path) == tuple(row)
+
+    def find_output(self, key):
+        """An existing, untouched output of conversion `key`, if any"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT output, size, mtime_ns FROM outputs WHERE key = ?", (key,)
+            ).fetchall()
+        for output, size, mtime_ns in rows:
+            if output_stat(Path(output)) == (size, mtime_ns):
+                return Path(output)
+        return None
+
+    def outputs(self):
+        """Absolute paths of every output this cache has recorded"""
+        with self.lock:
+            return {row[0] for row in self.db.execute("SELECT output FROM outputs")}
     
-    if not input_path.exists():
-        print(f"File not found: {input_path}")
-        return False
-        
-    # Create output path - either in same folder or specified output folder
+    def record(self, key, output_path):
+        size, mtime_ns = output_stat(output_path)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                (os.path.abspath(output_path), key, size, mtime_ns),
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def output_stat(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def package_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def converter_id():
+    """Identity of the document converter in use, part of every cache key"""
+    if converter_pool is not None:
+        return f"markitdown={package_version('markitdown')}"
+    return ts_mkd_id()
+
+
+@lru_cache(maxsize=None)
+def ts_mkd_id():
+    return f"ts-mkd/torch-snippets={package_version('torch-snippets')},markitdown={package_version('markitdown')}"
+
+
+def markdown_path(input_path, output_folder=None, output_name=None):
+    """Where the markdown for `input_path` goes - either in same folder or specified output folder"""
+    name = output_name or f"{input_path.stem}.md"
     if output_folder:
-        output_path = Path(output_folder) / f"{input_path.stem}.md"
         os.makedirs(output_folder, exist_ok=True)
-    else:
-        output_path = input_path.parent / f"{input_path.stem}.md"
+        return Path(output_folder) / name
+    return input_path.parent / name
+
+
+def cached_convert(input_path, output_path, convert, converter, cache=None, options=None):
+    """Run `convert(input_path, output_path)` unless `cache` already has the result"""
+    if cache is None:
+        return convert(input_path, output_path)
     
-    # Skip if output already exists to avoid errors
-    if output_path.exists():
-        print(f"Output already exists, skipping: {output_path}")
+    key = cache.key(input_path, converter, options)
+    if cache.is_fresh(key, output_path):
+        print(f"Unchanged since last conversion, skipping: {input_path}")
         return True
-        
-    # Build and run the ts mkd command
+    
+    # An identical file was already converted with the same converter
+    source = cache.find_output(key)
+    # (Sharded outputs are not copied: their index links to the source's own part files)
+    if source is not None and source != Path(os.path.abspath(output_path)) and not markdown_converters.part_paths(source):
+        shutil.copyfile(source, output_path)
+        cache.record(key, output_path)
+        print(f"Reused conversion of identical file: {source} → {output_path}")
+        return True
+    
+    if not convert(input_path, output_path):
+        return False
+    cache.record(key, output_path)
+    return True
+
+
+# Why the current thread's last conversion failed, kept for the job journal
+failure = threading.local()
+
+
+def conversion_failed(message):
+    """Report a failed conversion and remember why; returns False for convenience"""
+    print(message)
+    failure.message = message
+    return False
+
+
+def run_ts_mkd(input_path, output_path):
+    """Convert a file to markdown using ts mkd command"""
     try:
         cmd = ["ts", "mkd", str(input_path), "--output", str(output_path)]
         print(f"Running: {' '.join(cmd)}")
@@ -39,23 +202,438 @@ def convert_to_markdown(input_path, output_folder=None):
             print(f"Successfully converted: {input_path} → {output_path}")
             return True
         else:
-            print(f"Error converting {input_path}: {result.stderr}")
-            return False
+            return conversion_failed(f"Error converting {input_path}: {result.stderr}")
     except Exception as e:
-        print(f"Exception while converting {input_path}: {e}")
-        return False
+        return conversion_failed(f"Exception while converting {input_path}: {e}")
 
-def process_directory(root_path, output_root=None):
-    """Process all files in a directory and its subdirectories"""
+
+WORKER_FLAG = "--converter-worker"
+
+
+def worker_main(max_files, max_rss_mb):
+    """Loop of a converter worker process: load MarkItDown once, then convert
+    one `{"input", "output"}` JSON line from stdin at a time, answering with a
+    JSON line on stdout. Exits after `max_files` files or once its peak RSS
+    passes `max_rss_mb`; the pool replaces it.
+    """
+    # Anything the converter prints must not corrupt the reply stream
+    replies = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
     
-    root_path = Path(root_path)
-    converted_count = 0
-    error_count = 0
+    from markitdown import MarkItDown
+    converter = MarkItDown()
     
-    # Create parallel output structure if specified
-    if output_root:
-        output_root = Path(output_root)
-        os.makedirs(output_root, exist_ok=True)
+    for done, line in enumerate(sys.stdin, 1):
+        job = json.loads(line)
+        reply = {"ok": True}
+        try:
+            text = converter.convert(job["input"]).text_content
+            Path(job["output"]).write_text(text, encoding="utf-8")
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        reply["retire"] = done >= max_files or rss_mb > max_rss_mb
+        replies.write(json.dumps(reply) + "\n")
+        if reply["retire"]:
+            break
+
+
+class ConverterWorker:
+    """One long-lived `worker_main` process, talked to over its stdin/stdout"""
+
+    def __init__(self, max_files, max_rss_mb):
+        self.proc = subprocess.Popen(
+            [sys.executable, __file__, WORKER_FLAG, str(max_files), str(max_rss_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self.retired = False
+
+    def convert(self, input_path, output_path):
+        try:
+            self.proc.stdin.write(json.dumps({"input": str(input_path), "output": str(output_path)}) + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            self.retired = True
+            return {"ok": False, "error": f"converter worker exited ({self.proc.poll()})"}
+        reply = json.loads(line)
+        self.retired = reply["retire"]
+        return reply
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class ConverterPool:
+    """Persistent MarkItDown workers so library start-up is paid once per worker, not per file
+    
+    Workers are started on demand up to `size`, each serving one file at a
+    time, and are recycled after `max_files` files or when their memory
+    grows past `max_rss_mb`.
+    """
+
+    def __init__(self, size, max_files=200, max_rss_mb=1024):
+        self.max_files = max_files
+        self.max_rss_mb = max_rss_mb
+        self.idle = queue.Queue()
+        self.slots = threading.Semaphore(max(1, size))
+        self.workers = []
+        self.lock = threading.Lock()
+
+    def convert(self, input_path, output_path):
+        with self.slots:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                worker = ConverterWorker(self.max_files, self.max_rss_mb)
+                with self.lock:
+                    self.workers.append(worker)
+            reply = worker.convert(input_path, output_path)
+            if worker.retired:
+                worker.close()
+                with self.lock:
+                    self.workers.remove(worker)
+            else:
+                self.idle.put(worker)
+        if not reply["ok"]:
+            return conversion_failed(f"Error converting {input_path}: {reply['error']}")
+        print(f"Successfully converted: {input_path} → {output_path}")
+        return True
+
+    def close(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
+
+
+# Set by `process_directory` while it runs, when MarkItDown can be imported
+converter_pool = None
+
+
+def start_converter_pool(size, max_files=200, max_rss_mb=1024):
+    """Use persistent in-process converters if MarkItDown is installed, else keep `ts mkd`"""
+    global converter_pool
+    if converter_pool is None and importlib.util.find_spec("markitdown") is not None:
+        converter_pool = ConverterPool(size, max_files, max_rss_mb)
+    return converter_pool
+
+
+def stop_converter_pool():
+    global converter_pool
+    if converter_pool is not None:
+        converter_pool.close()
+        converter_pool = None
+
+
+def convert_document(input_path, output_path):
+    """Convert a non-audio document, through the worker pool when it is running"""
+    if converter_pool is not None:
+        return converter_pool.convert(input_path, output_path)
+    return run_ts_mkd(input_path, output_path)
+
+
+class Converter:
+    """A named way of turning files into markdown, with throughput counters
+    
+    `convert(input_path, output_path)` does the work; `identity` (a string or
+    a function returning one) goes into every conversion cache key so a
+    change of converter re-converts the affected files.
+    """
+    
+    def __init__(self, name, convert, identity):
+        self.name = name
+        self.convert = convert
+        self.identity = identity
+        self.lock = threading.Lock()
+        self.files = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0.0
+    
+    def id(self):
+        return self.identity() if callable(self.identity) else self.identity
+    
+    def __call__(self, input_path, output_path):
+        start = time.perf_counter()
+        success = False
+        try:
+            success = self.convert(input_path, output_path)
+            return success
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.files += 1
+                self.failures += not success
+                self.bytes += input_path.stat().st_size if input_path.exists() else 0
+                self.seconds += elapsed
+
+
+CONVERTERS = {}
+# Lowercase extension (".csv") → converter name
+EXTENSIONS = {}
+
+
+def native_id(name):
+    """Identity of a built-in converter, including the part limits that shape its output"""
+    options = markdown_converters.part_options()
+    return f"{name}/{markdown_converters.VERSION},rows={options['part_rows']},bytes={options['part_bytes']}"
+
+
+def register_converter(name, extensions=(), identity=None):
+    """Decorator registering `convert(input_path, output_path)` for `extensions`
+    
+    Later registrations win, so other scripts can take over an extension.
+    """
+    def decorate(convert):
+        CONVERTERS[name] = Converter(name, convert, identity or (lambda: native_id(name)))
+        for ext in extensions:
+            EXTENSIONS[ext.lower()] = name
+        return convert
+    return decorate
+
+
+register_converter("text", [".txt", ".text", ".log", ".rst", ".markdown"])(markdown_converters.text_to_markdown)
+register_converter("csv", [".csv", ".tsv"])(markdown_converters.csv_to_markdown)
+register_converter("json", [".json"])(markdown_converters.json_to_markdown)
+register_converter("html", [".html", ".htm", ".xhtml"])(markdown_converters.html_to_markdown)
+register_converter("ipynb", [".ipynb"])(markdown_converters.ipynb_to_markdown)
+register_converter("document", [".pdf", ".docx", ".pptx", ".doc", ".ppt", ".xls"], converter_id)(convert_document)
+
+
+def spreadsheet_id():
+    return f"{native_id('xlsx')},openpyxl={package_version('openpyxl')};{converter_id()}"
+
+
+@register_converter("spreadsheet", [".xlsx", ".xlsm"], spreadsheet_id)
+def convert_spreadsheet(input_path, output_path):
+    """Workbooks bigger than one part are streamed row by row when openpyxl is installed"""
+    if markdown_converters.openpyxl is not None and input_path.stat().st_size > markdown_converters.part_bytes:
+        return markdown_converters.xlsx_to_markdown(input_path, output_path)
+    return convert_document(input_path, output_path)
+
+
+def sniff(input_path):
+    """Pick a converter name from the first bytes of a file with an unknown extension"""
+    with open(input_path, "rb") as f:
+        head = f.read(4096)
+    if head.startswith((b"%PDF", b"PK\x03\x04", b"\xd0\xcf\x11\xe0")):
+        return "document"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<!doctype html", b"<html")):
+        return "html"
+    mime, _ = mimetypes.guess_type(input_path.name)
+    if mime and mime.startswith("text/"):
+        return "text"
+    if b"\0" in head:
+        return "document"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still text
+        if e.start < len(head) - 3:
+            return "document"
+    return "text"
+
+
+def pick_converter(input_path):
+    """The registered converter for `input_path`, by extension and then by content"""
+    name = EXTENSIONS.get(input_path.suffix.lower()) or sniff(input_path)
+    return CONVERTERS[name]
+
+
+def convert_to_markdown(input_path, output_folder=None, output_name=None, cache=None):
+    """Convert a file to markdown with the converter registered for its type
+    
+    Text, CSV, JSON, HTML and notebooks are converted in-process; PDF and
+    Office documents go to the MarkItDown workers or the ts mkd command.
+    """
+    
+    input_path = Path(input_path)
+    
+    if not input_path.exists():
+        return conversion_failed(f"File not found: {input_path}")
+        
+    output_path = markdown_path(input_path, output_folder, output_name)
+    converter = pick_converter(input_path)
+    return cached_convert(input_path, output_path, converter, converter.id(), cache)
+
+
+def print_converter_stats():
+    """Per-converter totals for this run, slowest first"""
+    used = sorted((c for c in CONVERTERS.values() if c.files), key=lambda c: c.seconds, reverse=True)
+    if not used:
+        return
+    print(f"\n{'Converter':<10} {'Files':>6} {'Failed':>6} {'MB':>9} {'Seconds':>9} {'Files/s':>8} {'MB/s':>8}")
+    for c in used:
+        mb = c.bytes / 1e6
+        seconds = max(c.seconds, 1e-9)
+        print(f"{c.name:<10} {c.files:>6} {c.failures:>6} {mb:>9.2f} {c.seconds:>9.2f} {c.files / seconds:>8.1f} {mb / seconds:>8.2f}")
+
+
+class JobJournal:
+    """Durable per-file record of a conversion run, kept in SQLite
+    
+    Every discovered file is a row with its status (pending, done or
+    failed), error text, duration and output path, so an interrupted run can
+    be resumed and failures retried without walking the input tree again.
+    It shares the database at `state_path` with the `ConversionCache`, so
+    it is never written into the input tree either.
+    Writes are batched into one transaction per `FLUSH_ROWS` rows or
+    `FLUSH_SECONDS`; a crash loses at most that window, whose files are
+    simply converted again (cheaply, thanks to the conversion cache).
+    """
+
+    FLUSH_ROWS = 1000
+    FLUSH_SECONDS = 1.0
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(str(db_path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (path TEXT PRIMARY KEY, status TEXT, error TEXT, "
+            "duration REAL, output TEXT, updated REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+        self.buffer = []
+        self.flushed = time.monotonic()
+
+    def record(self, path, status, output, error=None, duration=None):
+        self.buffer.append((os.path.abspath(path), status, error, duration, str(output), time.time()))
+        if len(self.buffer) >= self.FLUSH_ROWS or time.monotonic() - self.flushed > self.FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)", self.buffer)
+            self.buffer = []
+        self.flushed = time.monotonic()
+
+    def paths(self, status):
+        return {row[0] for row in self.db.execute("SELECT path FROM jobs WHERE status = ?", (status,))}
+
+    def jobs(self, status):
+        """`(file_path, output_dir, output_name)` of every job with `status`"""
+        rows = self.db.execute("SELECT path, output FROM jobs WHERE status = ? ORDER BY path", (status,)).fetchall()
+        for path, output in rows:
+            yield Path(path), Path(output).parent, Path(output).name
+
+    def outputs(self):
+        """Absolute paths of the markdown files written, or to be written, for the journal's jobs"""
+        self.flush()
+        return {os.path.abspath(row[0]) for row in self.db.execute("SELECT output FROM jobs")}
+    
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    @property
+    def walk_complete(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'walk_complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    @walk_complete.setter
+    def walk_complete(self, value):
+        self.flush()
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('walk_complete', ?)", ("1" if value else "0",))
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+class AdaptiveLimiter:
+    """Caps how many conversions run at once, backing off under pressure.
+
+    The cap is halved whenever a converter fails and grows back by one per
+    success (AIMD), and while the 1-minute load average is above
+    `LOAD_FACTOR` x CPUs no more than one conversion is admitted.
+    """
+
+    LOAD_FACTOR = 1.5
+
+    def __init__(self, max_jobs):
+        self.max_jobs = max(1, max_jobs)
+        self.limit = self.max_jobs
+        self.active = 0
+        self.cond = threading.Condition()
+
+    def overloaded(self):
+        if not hasattr(os, "getloadavg"):
+            return False
+        return os.getloadavg()[0] > (os.cpu_count() or 1) * self.LOAD_FACTOR
+
+    def acquire(self):
+        with self.cond:
+            while self.active >= (1 if self.overloaded() else self.limit):
+                self.cond.wait(timeout=1.0)
+            self.active += 1
+
+    def release(self, success):
+        with self.cond:
+            self.active -= 1
+            if not success:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.max_jobs:
+                self.limit += 1
+            self.cond.notify_all()
+
+
+class ThreadOutput(io.TextIOBase):
+    """`sys.stdout` stand-in that holds back what a capturing thread prints
+    
+    Between `capture()` and `release()` a thread's writes are buffered and
+    returned by `release()`, so whichever thread reports the results can
+    print them in order; other threads write straight through to `stream`.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def capture(self):
+        self.local.buffer = []
+
+    def release(self):
+        text = "".join(self.local.buffer)
+        self.local.buffer = None
+        return text
+
+
+def iter_files(root_path, output_root=None, own_outputs=frozenset()):
+    """Yield `(file_path, output_dir, output_name)` for every file that should be converted
+    
+    Files are written to `<stem>.md`, except when several files in a folder
+    share a stem (`notes.pdf`, `notes.docx`, `notes.md`): those get
+    `<name>.md` (`notes.pdf.md`) so they cannot overwrite each other.
+    Markdown files in `own_outputs` (absolute paths) were written by an
+    earlier run and do not count, or every rerun in place would rename.
+    """
     
     # Get all files in the directory and subdirectories
     for dirpath, dirnames, filenames in os.walk(root_path):
@@ -68,8 +646,12 @@ def process_directory(root_path, output_root=None):
             os.makedirs(current_output_dir, exist_ok=True)
         else:
             current_output_dir = None
-            
-        print(f"\nProcessing directory: {current_dir}")
+        
+        stems = Counter(
+            Path(f).stem for f in filenames
+            if not f.startswith(".")
+            and not (Path(f).suffix.lower() == ".md" and os.path.abspath(current_dir / f) in own_outputs)
+        )
         
         # Process each file
         for filename in filenames:
@@ -77,39 +659,171 @@ def process_directory(root_path, output_root=None):
             
             # Skip if already a markdown file
             if file_path.suffix.lower() == ".md":
-                print(f"Skipping existing markdown file: {file_path}")
                 continue
                 
             # Skip hidden files
             if filename.startswith("."):
                 continue
                 
-            print(f"Converting: {file_path}")
-            success = convert_to_markdown(file_path, current_output_dir)
-            
-            if success:
-                converted_count += 1
+            if stems[file_path.stem] > 1:
+                yield file_path, current_output_dir, f"{filename}.md"
             else:
-                error_count += 1
-                
-            # Small delay to avoid overwhelming the system
-            time.sleep(0.5)
+                yield file_path, current_output_dir, None
+
+
+def state_path(root_path, output_root=None):
+    """The SQLite file holding the `ConversionCache` and `JobJournal` of a run
+    
+    It goes in the output folder when there is one, and otherwise in
+    `STATE_DIR`, one file per input folder, so nothing but the markdown is
+    ever written into the tree being converted.
+    """
+    if output_root:
+        return Path(output_root) / ConversionCache.FILENAME
+    root = os.path.abspath(root_path)
+    digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:16]
+    return STATE_DIR / f"{Path(root).name or 'root'}-{digest}.sqlite"
+
+
+def process_directory(root_path, output_root=None, jobs=None, convert=None, use_cache=True,
+                      worker_max_files=200, worker_max_rss_mb=1024, resume=False, retry_failed=False):
+    """Process all files in a directory and its subdirectories
+    
+    Up to `jobs` files are converted concurrently by `convert` (default
+    `convert_to_markdown`); progress, including whatever a conversion
+    prints, is reported in discovery order as results arrive. Unless
+    `use_cache` is off, a `ConversionCache` at `state_path` decides which
+    files actually need work. Documents go to a `ConverterPool` of `jobs`
+    workers while this runs.
+    
+    Every file's outcome is written to a `JobJournal` next to the cache.
+    With `resume`, files the journal already has as done are skipped (and
+    the tree is not walked again while the last finished walk still has
+    pending files, so files added since are picked up next time); with
+    `retry_failed`, only the journal's failed files are converted.
+    """
+    
+    root_path = Path(root_path)
+    convert = convert or convert_to_markdown
+    limiter = AdaptiveLimiter(jobs or DEFAULT_JOBS)
+    converted_count = 0
+    error_count = 0
+    
+    # Create parallel output structure if specified
+    if output_root:
+        output_root = Path(output_root)
+        os.makedirs(output_root, exist_ok=True)
+    state_db = state_path(root_path, output_root)
+    state_db.parent.mkdir(parents=True, exist_ok=True)
+    cache = ConversionCache(state_db) if use_cache else None
+    journal = JobJournal(state_db)
+    
+    if retry_failed:
+        print(f"Retrying {journal.counts().get('failed', 0)} failed files from the journal")
+        work = journal.jobs("failed")
+    elif resume and journal.walk_complete and journal.counts().get("pending", 0):
+        print(f"Resuming {journal.counts()['pending']} pending files from the journal")
+        work = journal.jobs("pending")
+    else:
+        own_outputs = journal.outputs() | (cache.outputs() if cache else set())
+        work = discover(root_path, output_root, journal, skip=journal.paths("done") if resume else set(), own_outputs=own_outputs)
+    
+    output = ThreadOutput(sys.stdout)
+    
+    def run(file_path, output_dir, output_name):
+        success = False
+        failure.message = None
+        start = time.perf_counter()
+        output.capture()
+        try:
+            success = convert(file_path, output_dir, output_name, cache=cache)
+        except Exception as e:
+            conversion_failed(f"Exception while converting {file_path}: {e}")
+        finally:
+            log = output.release()
+            limiter.release(success)
+        error = None if success else failure.message or "conversion failed"
+        return success, error, time.perf_counter() - start, log
+    
+    directory = None
+    
+    def report(index, file_path, output_path, future):
+        nonlocal converted_count, error_count, directory
+        success, error, duration, log = future.result()
+        if success:
+            converted_count += 1
+        else:
+            error_count += 1
+        journal.record(file_path, "done" if success else "failed", output_path, error, duration)
+        if file_path.parent != directory:
+            directory = file_path.parent
+            print(f"\nProcessing directory: {directory}")
+        print(f"Converting: {file_path}")
+        print(log, end="")
+        print(f"[{index}] {'✓' if success else '✗'} {file_path}")
+    
+    start_converter_pool(limiter.max_jobs, worker_max_files, worker_max_rss_mb)
+    pending = deque()
+    try:
+        with contextlib.redirect_stdout(output), ThreadPoolExecutor(max_workers=limiter.max_jobs) as pool:
+            for index, (file_path, output_dir, output_name) in enumerate(work, 1):
+                output_path = markdown_path(file_path, output_dir, output_name)
+                limiter.acquire()
+                pending.append((index, file_path, output_path, pool.submit(run, file_path, output_dir, output_name)))
+                while pending and pending[0][3].done():
+                    report(*pending.popleft())
+            while pending:
+                report(*pending.popleft())
+    finally:
+        stop_converter_pool()
+        print_converter_stats()
+        journal.close()
+        if cache is not None:
+            cache.close()
     
     return converted_count, error_count
 
+
+def discover(root_path, output_root, journal, skip=(), own_outputs=frozenset()):
+    """`iter_files`, recording each file as pending and leaving out the `skip` paths"""
+    journal.walk_complete = False
+    for file_path, output_dir, output_name in iter_files(root_path, output_root, own_outputs):
+        if os.path.abspath(file_path) in skip:
+            continue
+        journal.record(file_path, "pending", markdown_path(file_path, output_dir, output_name))
+        yield file_path, output_dir, output_name
+    journal.walk_complete = True
+
 if __name__ == "__main__":
     import argparse
     
+    if sys.argv[1:2] == [WORKER_FLAG]:
+        worker_main(int(sys.argv[2]), float(sys.argv[3]))
+        sys.exit(0)
+    
     parser = argparse.ArgumentParser(description="Convert all files in a directory to Markdown")
     parser.add_argument("input_dir", help="Directory containing files to convert")
     parser.add_argument("--output", help="Output directory for markdown files (optional)")
+    parser.add_argument("--no-cache", action="store_true", help=f"Convert every file, ignoring the conversion cache (kept in the output directory, or in {STATE_DIR} without --output)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Maximum number of files converted at once (default: {DEFAULT_JOBS})")
+    parser.add_argument("--resume", action="store_true", help="Skip files the job journal (kept with the conversion cache) already has as converted")
+    parser.add_argument("--retry-failed", action="store_true", help="Only convert the files that failed in earlier runs")
+    parser.add_argument("--part-rows", type=int, default=markdown_converters.DEFAULT_PART_ROWS, help="Split text, JSON and table output into part files of at most this many rows")
+    parser.add_argument("--part-mb", type=float, default=markdown_converters.DEFAULT_PART_BYTES / 1024 / 1024, help="Split text, JSON and table output into part files of at most this many MB")
+    parser.add_argument("--worker-max-files", type=int, default=200, help="Restart a converter worker after this many files")
+    parser.add_argument("--worker-max-rss-mb", type=float, default=1024, help="Restart a converter worker once its memory passes this many MB")
     args = parser.parse_args()
+    markdown_converters.set_part_limits(args.part_rows, args.part_mb)
     
     print(f"Starting conversion of all files in: {args.input_dir}")
     if args.output:
         print(f"Output directory: {args.output}")
     
-    converted, errors = process_directory(args.input_dir, args.output)
+    converted, errors = process_directory(
+        args.input_dir, args.output, jobs=args.jobs, use_cache=not args.no_cache,
+        worker_max_files=args.worker_max_files, worker_max_rss_mb=args.worker_max_rss_mb,
+        resume=args.resume, retry_failed=args.retry_failed,
+    )
     
     print(f"\nConversion complete:")
     print(f"- Successfully converted: {converted} files")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# filepath: scripts/markdown_converters.py
+"""Built-in streaming converters for formats Python can turn into markdown itself
+
+Each converter takes `(input_path, output_path)`, reads its input
+incrementally and writes markdown as it goes, so memory stays flat
+regardless of file size. Text, JSON and tables that outgrow the part
+limits are split into part files with an index page at `output_path`.
+"""
+
+import csv
+import glob
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+try:
+    import openpyxl
+except ImportError:  # spreadsheets then go to the document converter
+    openpyxl = None
+
+# Bumped whenever the output of these converters changes, so cached results are redone
+VERSION = "2"
+
+
+# Large outputs are split into part files once a part reaches either limit
+DEFAULT_PART_ROWS = 100_000
+DEFAULT_PART_BYTES = 10 * 1024 * 1024
+part_rows = DEFAULT_PART_ROWS
+part_bytes = DEFAULT_PART_BYTES
+# Longest line read at once; longer lines are handled in pieces
+MAX_LINE = 1 << 20
+
+
+def set_part_limits(rows=None, mb=None):
+    """Configure the row and size caps of each markdown part file"""
+    global part_rows, part_bytes
+    part_rows = rows or DEFAULT_PART_ROWS
+    part_bytes = int(mb * 1024 * 1024) if mb else DEFAULT_PART_BYTES
+
+
+def part_options():
+    """The part limits, for the conversion cache key"""
+    return {"part_rows": part_rows, "part_bytes": part_bytes}
+
+
+def part_paths(output_path):
+    """Part files written next to `output_path` by a sharded conversion"""
+    output_path = Path(output_path)
+    return sorted(output_path.parent.glob(f"{glob.escape(output_path.stem)}.part-[0-9][0-9][0-9][0-9].md"))
+
+
+class ShardWriter:
+    """Writes rows to `<stem>.part-NNNN.md` files of bounded size, plus an index
+    
+    Every part starts with `header` and ends with `footer`, so each one is
+    valid markdown on its own (a table repeats its heading row, a code block
+    is reopened). When everything fits in one part it simply becomes
+    `output_path` and no index is written.
+    """
+    
+    def __init__(self, output_path, title, header="", footer="", max_rows=None, max_bytes=None):
+        self.output_path = Path(output_path)
+        self.title = title
+        self.header = header
+        self.footer = footer
+        self.max_rows = max_rows or part_rows
+        self.max_bytes = max_bytes or part_bytes
+        self.parts = []
+        self.part = None
+        self.rows = 0
+        self.size = 0
+        self.total_rows = 0
+        self.total_bytes = 0
+        self.row_open = False  # the last row written has not ended yet
+    
+    def part_path(self, number):
+        return self.output_path.with_name(f"{self.output_path.stem}.part-{number:04d}.md")
+    
+    def next_part(self):
+        self.end_part()
+        path = self.part_path(len(self.parts) + 1)
+        self.parts.append([path, self.total_rows + 1, self.total_rows])
+        self.part = open(path, "w", encoding="utf-8")
+        self.part.write(self.header)
+        self.rows = 0
+        self.size = len(self.header.encode("utf-8"))
+    
+    def end_part(self):
+        if self.part is not None:
+            self.part.write(self.footer)
+            self.part.close()
+            self.part = None
+    
+    def start_section(self, header):
+        """Switch to a new `header`, e.g. another table, written now and atop later parts"""
+        self.header = header
+        if self.part is not None:
+            self.part.write(header)
+            self.size += len(header.encode("utf-8"))
+    
+    def write_row(self, text, end=True):
+        """Write `text` as a row, or with `end=False` as the start of one that later calls continue
+        
+        A new part is only ever started between rows.
+        """
+        size = len(text.encode("utf-8"))
+        if not self.row_open and (
+            self.part is None or (self.rows and (self.rows >= self.max_rows or self.size + size > self.max_bytes))
+        ):
+            self.next_part()
+        self.part.write(text)
+        self.size += size
+        self.total_bytes += size
+        self.row_open = not end
+        if end:
+            self.end_row()
+    
+    def end_row(self):
+        self.rows += 1
+        self.total_rows += 1
+        self.parts[-1][2] = self.total_rows
+    
+    def close(self):
+        if self.part is None and not self.parts:
+            self.next_part()
+        if self.row_open:
+            self.row_open = False
+            self.end_row()
+        self.end_part()
+        if len(self.parts) == 1:
+            os.replace(self.parts[0][0], self.output_path)
+        else:
+            with open(self.output_path, "w", encoding="utf-8") as index:
+                index.write(f"# {self.title}\n\n")
+                index.write(f"Split into {len(self.parts)} parts ({self.total_rows} rows, {self.total_bytes / 1e6:.1f} MB of markdown).\n\n")
+                for number, (path, first, last) in enumerate(self.parts, 1):
+                    index.write(f"- [Part {number}]({path.name}): rows {first}-{last}\n")
+        # Parts left over from an earlier, longer conversion
+        written = {path for path, _, _ in self.parts} if len(self.parts) > 1 else set()
+        for path in part_paths(self.output_path):
+            if path not in written:
+                path.unlink()
+        return True
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.end_part()
+            for path, _, _ in self.parts:
+                path.unlink(missing_ok=True)
+
+
+def open_text(path):
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def read_lines(src):
+    """Lines of `src`, with very long lines cut into `MAX_LINE` pieces
+    
+    Only the last piece of a line ends in a newline (and the last line of
+    the file may have none).
+    """
+    return iter(lambda: src.readline(MAX_LINE), "")
+
+
+def text_to_markdown(input_path, output_path):
+    """Plain text is already markdown"""
+    with open_text(input_path) as src, ShardWriter(output_path, Path(input_path).name) as out:
+        for piece in read_lines(src):
+            out.write_row(piece, end=piece.endswith("\n"))
+    return True
+
+
+def json_to_markdown(input_path, output_path):
+    """JSON goes into a fenced code block, unchanged"""
+    with open_text(input_path) as src, ShardWriter(output_path, Path(input_path).name, "```json\n", "```\n") as out:
+        ended = True
+        for piece in read_lines(src):
+            ended = piece.endswith("\n")
+            out.write_row(piece, end=ended)
+        if not ended:
+            # The closing fence needs a line of its own
+            out.write_row("\n")
+    return True
+
+
+def table_cell(value):
+    return str(value).replace("|", "\\|").replace("\r", " ").replace("\n", " ").strip()
+
+
+def table_row(cells):
+    return "| " + " | ".join(table_cell(c) for c in cells) + " |\n"
+
+
+def table_header(header, heading=""):
+    return heading + table_row(header) + "|" + " --- |" * len(header) + "\n"
+
+
+def write_table(rows, out, heading=""):
+    """Write `rows` (header first) to the `ShardWriter` as a markdown table, one row at a time
+    
+    Every part file repeats `heading` and the table's header row. Rows are
+    padded or cut to the header's width, or the table would not render.
+    """
+    rows = iter(rows)
+    header = next((row for row in rows if len(row)), None)
+    if header is None:
+        return
+    width = len(header)
+    out.start_section(table_header(header, heading))
+    for row in rows:
+        row = list(row)[:width]
+        if len(row) < width:
+            row += [""] * (width - len(row))
+        out.write_row(table_row(row))
+
+
+def csv_to_markdown(input_path, output_path):
+    """CSV/TSV rows become a markdown table"""
+    delimiter = "\t" if str(input_path).lower().endswith(".tsv") else ","
+    # Cells can be far larger than the csv module's default limit of 128 KB
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with open_text(input_path) as src, ShardWriter(output_path, Path(input_path).name) as out:
+        write_table(csv.reader(src, delimiter=delimiter), out)
+    return True
+
+
+def xlsx_to_markdown(input_path, output_path):
+    """Each worksheet becomes a markdown table, read row by row with openpyxl"""
+    workbook = openpyxl.load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        with ShardWriter(output_path, Path(input_path).name) as out:
+            for sheet in workbook.worksheets:
+                rows = (["" if v is None else v for v in row] for row in sheet.iter_rows(values_only=True))
+                write_table(rows, out, f"\n## {sheet.title}\n\n")
+    finally:
+        workbook.close()
+    return True
+
+
+def ipynb_to_markdown(input_path, output_path):
+    """Markdown cells as they are, code and raw cells fenced
+    
+    Unlike the other formats the notebook is parsed whole, outputs
+    included, as its cells are one JSON document; it is not sharded.
+    """
+    with open_text(input_path) as src:
+        notebook = json.load(src)
+    metadata = notebook.get("metadata", {})
+    language = metadata.get("kernelspec", {}).get("language") or metadata.get("language_info", {}).get("name", "")
+    with open(output_path, "w", encoding="utf-8") as out:
+        for cell in notebook.get("cells", []):
+            source = cell.get("source", "")
+            if isinstance(source, list):
+                source = "".join(source)
+            if not source.strip():
+                continue
+            if cell.get("cell_type") == "markdown":
+                out.write(source.rstrip("\n") + "\n\n")
+            elif cell.get("cell_type") == "code":
+                out.write(f"```{language}\n{source.rstrip()}\n```\n\n")
+            else:
+                out.write(f"```\n{source.rstrip()}\n```\n\n")
+    return True
+
+
+class NewlineCollapser:
+    """File wrapper that writes at most one blank line in a row and none at either end
+    
+    `verbatim` text (the inside of `<pre>`) keeps the newlines before it as they are.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.started = False
+        self.newlines = 0
+
+    def write(self, text, verbatim=False):
+        stripped = text.lstrip("\n")
+        self.newlines += len(text) - len(stripped)
+        if not stripped:
+            return
+        if self.started:
+            self.out.write("\n" * (self.newlines if verbatim else min(self.newlines, 2)))
+        self.started = True
+        body = stripped.rstrip("\n")
+        self.out.write(body)
+        self.newlines = len(stripped) - len(body)
+
+    def close(self):
+        if self.started:
+            self.out.write("\n")
+
+
+class HTMLToMarkdown(HTMLParser):
+    """Minimal HTML to markdown: headings, paragraphs, lists, links, emphasis, code and tables"""
+
+    SKIP = {"script", "style", "head", "noscript", "template"}
+    BLOCKS = {"p", "div", "section", "article", "main", "header", "footer", "blockquote", "table", "figure"}
+
+    def __init__(self, out):
+        super().__init__(convert_charrefs=True)
+        self.out = NewlineCollapser(out)
+        self.skip = 0
+        self.lists = 0
+        self.pre = False
+        self.links = []
+        self.cells = 0
+        self.rows = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP:
+            self.skip += 1
+        elif self.skip:
+            return
+        elif re.fullmatch(r"h[1-6]", tag):
+            self.out.write("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag in self.BLOCKS:
+            self.out.write("\n\n")
+            if tag == "table":
+                self.rows = 0
+        elif tag == "br":
+            self.out.write("  \n")
+        elif tag == "hr":
+            self.out.write("\n\n---\n\n")
+        elif tag in ("ul", "ol"):
+            self.lists += 1
+            self.out.write("\n")
+        elif tag == "li":
+            self.out.write("\n" + "  " * max(self.lists - 1, 0) + "- ")
+        elif tag in ("strong", "b"):
+            self.out.write("**")
+        elif tag in ("em", "i"):
+            self.out.write("*")
+        elif tag == "pre":
+            self.pre = True
+            self.out.write("\n\n```\n")
+        elif tag == "code" and not self.pre:
+            self.out.write("`")
+        elif tag == "a":
+            self.links.append(attrs.get("href"))
+            self.out.write("[")
+        elif tag == "img":
+            self.out.write(f"![{attrs.get('alt') or ''}]({attrs.get('src') or ''})")
+        elif tag == "tr":
+            self.cells = 0
+            self.out.write("\n|")
+        elif tag in ("td", "th"):
+            self.cells += 1
+            self.out.write(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(self.skip - 1, 0)
+        elif self.skip:
+            return
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCKS:
+            self.out.write("\n\n")
+        elif tag in ("ul", "ol"):
+            self.lists = max(self.lists - 1, 0)
+            self.out.write("\n")
+        elif tag in ("strong", "b"):
+            self.out.write("**")
+        elif tag in ("em", "i"):
+            self.out.write("*")
+        elif tag == "pre":
+            self.pre = False
+            self.out.write("\n```\n\n")
+        elif tag == "code" and not self.pre:
+            self.out.write("`")
+        elif tag == "a":
+            href = self.links.pop() if self.links else None
+            self.out.write(f"]({href})" if href else "]")
+        elif tag in ("td", "th"):
+            self.out.write(" |")
+        elif tag == "tr":
+            self.rows += 1
+            if self.rows == 1:
+                self.out.write("\n|" + " --- |" * self.cells)
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        if not self.pre:
+            data = re.sub(r"\s+", " ", data)
+        self.out.write(data, verbatim=self.pre)
+
+
+def html_to_markdown(input_path, output_path):
+    with open_text(input_path) as src, open(output_path, "w", encoding="utf-8") as out:
+        parser = HTMLToMarkdown(out)
+        for chunk in iter(lambda: src.read(1 << 16), ""):
+            parser.feed(chunk)
+        parser.close()
+        parser.out.close()
+    return True
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# filepath: scripts/transcribe_daemon.py
+"""Local transcription service that keeps the Whisper model loaded between files
+
+    python scripts/transcribe_daemon.py --model openai/whisper-small &
+    python scripts/audio_to_text.py recordings/     # uses the daemon
+    python scripts/transcribe_daemon.py --status
+
+Clients send one JSON line per request over a Unix socket and get one JSON
+line back. Any number of clients can connect; their jobs wait in one queue
+and a single thread runs them on the model. The model is unloaded after
+`--idle-timeout` seconds without work and loaded again by the next job.
+Clients find the socket through DAKSH_TRANSCRIBE_SOCKET, which `--socket`
+defaults to as well.
+"""
+
+import gc
+import json
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+import audio_to_text
+import convert_all_to_markdown
+
+
+class Job:
+    def __init__(self, input_path, output_path):
+        self.input_path = Path(input_path)
+        self.output_path = Path(output_path)
+        self.queued = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.success = False
+        self.error = None
+        self.done = threading.Event()
+
+
+class TranscriptionService:
+    """The job queue and the thread that runs it on the model"""
+
+    def __init__(self, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.last_latency = None
+        self.running = None
+        self.started = time.time()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, input_path, output_path):
+        job = Job(input_path, output_path)
+        self.jobs.put(job)
+        print(f"Queued {job.input_path} (queue depth {self.jobs.qsize()})", flush=True)
+        job.done.wait()
+        return job
+
+    def close(self):
+        """Stop the thread once the jobs already queued are done"""
+        self.jobs.put(None)
+
+    def run(self):
+        while True:
+            try:
+                job = self.jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self.evict()
+                continue
+            if job is None:
+                return
+            job.started = time.perf_counter()
+            self.running = str(job.input_path)
+            convert_all_to_markdown.failure.message = None
+            try:
+                job.success = audio_to_text.transcribe_audio(job.input_path, job.output_path)
+                job.error = None if job.success else convert_all_to_markdown.failure.message
+            except Exception as e:
+                job.error = f"Error transcribing audio: {e}"
+            job.finished = time.perf_counter()
+            self.running = None
+            with self.lock:
+                self.completed += job.success
+                self.failed += not job.success
+                self.busy_seconds += job.finished - job.started
+                self.last_latency = job.finished - job.queued
+                self.latency_seconds += self.last_latency
+            print(
+                f"{'Done' if job.success else 'Failed'}: {job.input_path} in {job.finished - job.started:.2f}s"
+                f" (waited {job.started - job.queued:.2f}s, queue depth {self.jobs.qsize()})",
+                flush=True,
+            )
+            job.done.set()
+
+    def evict(self):
+        if audio_to_text.whisper_model is not None:
+            print(f"Idle for {self.idle_timeout:g}s, unloading the model", flush=True)
+            audio_to_text.whisper_model = audio_to_text.whisper_processor = None
+            gc.collect()
+
+    def status(self):
+        with self.lock:
+            jobs = self.completed + self.failed
+            return {
+                "ok": True,
+                "id": audio_to_text.whisper_id(),
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "model_loaded": audio_to_text.whisper_model is not None,
+                "queue_depth": self.jobs.qsize(),
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "busy_seconds": self.busy_seconds,
+                "mean_latency": self.latency_seconds / jobs if jobs else None,
+                "last_latency": self.last_latency,
+            }
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                reply = self.server.dispatch(request)
+            except Exception as e:
+                reply = {"ok": False, "error": f"Bad request: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class TranscriptionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        self.service = service
+        super().__init__(socket_path, Handler)
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "status":
+            return self.service.status()
+        if op != "transcribe":
+            return {"ok": False, "error": f"Unknown operation: {op!r}"}
+        # Settings decide the output and the cache key, so they must agree with the client's
+        if request.get("id") != audio_to_text.whisper_id():
+            return {"ok": False, "mismatch": True, "id": audio_to_text.whisper_id()}
+        job = self.service.submit(request["input"], request["output"])
+        return {
+            "ok": job.success,
+            "error": job.error,
+            "waited": job.started - job.queued,
+            "seconds": job.finished - job.started,
+        }
+
+
+def remove_stale_socket(socket_path):
+    """Remove a socket file left behind by a daemon that is gone; fail if one is still running"""
+    if not os.path.exists(socket_path):
+        return
+    try:
+        audio_to_text.daemon_request({"op": "status"}, socket_path, timeout=5)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    sys.exit(f"A transcription daemon is already listening on {socket_path}")
+
+
+def print_status(socket_path):
+    try:
+        status = audio_to_text.daemon_request({"op": "status"}, socket_path, timeout=5)
+    except OSError:
+        print(f"No transcription daemon is listening on {socket_path}")
+        return 1
+    mean = status["mean_latency"]
+    print(f"Transcription daemon {status['pid']} on {socket_path}, up {status['uptime'] / 60:.0f} min")
+    print(f"- Model: {status['id']} ({'loaded' if status['model_loaded'] else 'unloaded'})")
+    print(f"- Queue depth: {status['queue_depth']}, running: {status['running'] or 'nothing'}")
+    print(f"- Jobs: {status['completed']} done, {status['failed']} failed, {status['busy_seconds']:.1f}s busy")
+    print(f"- Latency: mean {mean:.2f}s, last {status['last_latency']:.2f}s" if mean is not None else "- Latency: no jobs yet")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve Whisper transcription on a Unix socket")
+    parser.add_argument("--socket", default=audio_to_text.SOCKET_PATH, help=f"Socket path (default: {audio_to_text.SOCKET_PATH})")
+    parser.add_argument("--idle-timeout", type=float, default=600, help="Unload the model after this many idle seconds (default: 600)")
+    parser.add_argument("--status", action="store_true", help="Show the running daemon's queue and latency, then exit")
+    audio_to_text.add_whisper_arguments(parser)
+    args = parser.parse_args()
+
+    if args.status:
+        sys.exit(print_status(args.socket))
+
+    audio_to_text.apply_whisper_arguments(args)
+    remove_stale_socket(args.socket)
+    audio_to_text.initialize_whisper()
+    # Remove the socket on `kill` as well as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    service = TranscriptionService(args.idle_timeout)
+    with TranscriptionServer(args.socket, service) as server:
+        os.chmod(args.socket, 0o600)
+        print(f"Transcribing with {audio_to_text.whisper_id()} on {args.socket}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+            os.unlink(args.socket)
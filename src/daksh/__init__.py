@@ -6,13 +6,22 @@ __all__ = [
     '__email__',
     'cli',
     'health',
-    'io'
+    'pipeline',
+    'update_prompts',
+    'vision',
 ]
 
 __author__ = """Yeshwanth Reddy"""
 __email__ = 'yeshwanth@divami.com'
 __version__ = '0.1.0'
 
+import importlib
+
 from .__pre_init__ import cli
-from .health import *
-from .update_prompts import *
\ No newline at end of file
+
+
+def __getattr__(name):
+    # Submodules are imported on first access so `import daksh` stays cheap
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
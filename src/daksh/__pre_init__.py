@@ -1,5 +1,64 @@
 """Console script for daksh."""
 
+import importlib
+
 import typer
+from typer.core import TyperCommand, TyperGroup
+
+# Subcommands are imported only when they run, so `daksh --help` and light
+# commands never pay for heavy modules. name -> (module, function, short help)
+LAZY_COMMANDS = {
+    "health-check": ("daksh.health", "health_check", "Check the health of the application."),
+    "pipeline": ("daksh.pipeline", "pipeline", "Convert documents and generate vision.md in one pass."),
+    "update-prompts": (
+        "daksh.update_prompts",
+        "update_prompts",
+        "Install or update the daksh prompts and editor configuration.",
+    ),
+    "vision": ("daksh.vision", "vision", "Generate vision.md from converted markdown documents."),
+}
+
+
+def command_name(info) -> str:
+    return info.name or info.callback.__name__.lower().replace("_", "-")
+
+
+def load_command(name: str):
+    """Import the module behind a lazy command and build its click command."""
+    module, function, _ = LAZY_COMMANDS[name]
+    callback = getattr(importlib.import_module(module), function)
+    info = next(i for i in cli.registered_commands if i.callback is callback)
+    app = typer.Typer(add_completion=False, rich_markup_mode=cli.rich_markup_mode)
+    app.registered_commands.append(info)
+    command = typer.main.get_command(app)
+    command.name = name
+    return command
+
+
+class LazyCommand(TyperCommand):
+    """Placeholder that lists a command in `--help` without importing it."""
+
+
+class LazyGroup(TyperGroup):
+    def list_commands(self, ctx) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(LAZY_COMMANDS))
+
+    def get_command(self, ctx, name: str):
+        if name in self.commands or name not in LAZY_COMMANDS:
+            return super().get_command(ctx, name)
+        short_help = LAZY_COMMANDS[name][2]
+        return LazyCommand(name=name, help=short_help, short_help=short_help)
+
+    def resolve_command(self, ctx, args):
+        name, command, args = super().resolve_command(ctx, args)
+        if isinstance(command, LazyCommand):
+            command = self.commands[name] = load_command(name)
+        return name, command, args
+
+
+cli = typer.Typer(cls=LazyGroup, no_args_is_help=True)
+
 
-cli = typer.Typer(no_args_is_help=True)
+@cli.callback()
+def main() -> None:
+    """Documentation & Artifact Knowledge Synchronization Hub."""
@@ -0,0 +1,111 @@
+"""Single-file packed asset bundle with a precomputed index.
+
+Layout: the 8-byte magic, the index length as a little-endian u64, the JSON
+index, then the concatenated file contents. The index maps every asset path
+(relative, posix) to its `offset` into the data section, `size`, `mode` and
+`sha256`, so readers never walk a directory or hash anything.
+
+This module is also loaded by `scripts/build_prep.py` straight from its file,
+so it must only import the standard library.
+"""
+
+import hashlib, json, mmap, os, struct
+from functools import lru_cache
+from pathlib import Path as P
+from typing import NamedTuple
+
+BUNDLE_NAME = "assets.pack"
+MAGIC = b"DAKSHPK1"
+HEADER = struct.Struct("<8sQ")
+
+
+class Member(NamedTuple):
+    bundle: str
+    offset: int
+    size: int
+
+
+class Bundle(NamedTuple):
+    index: dict
+    data: mmap.mmap
+    start: int
+
+    def read(self, member: Member) -> memoryview:
+        start = self.start + member.offset
+        return memoryview(self.data)[start : start + member.size]
+
+
+def file_mode(file: P) -> int:
+    """Permissions an asset is installed with: executable for shell scripts."""
+    return 0o755 if file.suffix == ".sh" else 0o644
+
+
+def index_folder(folder: P) -> dict:
+    """Index every file under `folder`, hidden ones included, in sorted order."""
+    files, offset = {}, 0
+    for f in sorted(folder.rglob("*")):
+        if not f.is_file():
+            continue
+        data = f.read_bytes()
+        files[f.relative_to(folder).as_posix()] = {
+            "offset": offset,
+            "size": len(data),
+            "mode": file_mode(f),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        offset += len(data)
+    return files
+
+
+def read_index(bundle: P) -> dict:
+    with open(bundle, "rb") as f:
+        magic, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{bundle} is not a daksh asset bundle")
+        return json.loads(f.read(length))
+
+
+def write_bundle(folder: P, bundle: P) -> bool:
+    """Pack `folder` into `bundle`; returns False when the bundle was already current."""
+    files = index_folder(folder)
+    if bundle.exists():
+        try:
+            if read_index(bundle) == files:
+                return False
+        except (OSError, ValueError, struct.error):
+            pass
+    index = json.dumps(files, sort_keys=True, separators=(",", ":")).encode()
+    tmp = bundle.with_name(bundle.name + ".tmp")
+    with open(tmp, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(index)))
+        out.write(index)
+        for rel in files:
+            out.write((folder / rel).read_bytes())
+    os.replace(tmp, bundle)
+    return True
+
+
+@lru_cache(maxsize=None)
+def open_bundle(bundle: str) -> Bundle:
+    """Map `bundle` into memory once per process and parse its index."""
+    with open(bundle, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{bundle} is not a daksh asset bundle")
+    start = HEADER.size + length
+    index = json.loads(data[HEADER.size : start])
+    return Bundle(index, data, start)
+
+
+def members(bundle: P) -> dict[str, tuple[Member, dict]]:
+    """Every asset in `bundle` as `(Member, index entry)`, keyed by asset path."""
+    opened = open_bundle(str(bundle))
+    return {
+        rel: (Member(str(bundle), entry["offset"], entry["size"]), entry)
+        for rel, entry in opened.index.items()
+    }
+
+
+def read_member(member: Member) -> memoryview:
+    return open_bundle(member.bundle).read(member)
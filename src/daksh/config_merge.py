@@ -0,0 +1,125 @@
+"""Structured merge of the packaged `.vscode` JSON templates into a repository."""
+
+import difflib, json, os
+from pathlib import Path as P
+
+from .console import Info
+
+# Used when the packaged template is missing or unreadable
+FALLBACK_TEMPLATES = {
+    "settings.json": {"chat.modeFilesLocations": {".daksh/prompts/**/": True}},
+    "mcp.json": {"servers": {}},
+    "tasks.json": {
+        "version": "2.0.0",
+        "tasks": [
+            {
+                "label": "Run MkDocs",
+                "type": "shell",
+                "command": "chmod +x ./run-mkdocs.sh && ./run-mkdocs.sh",
+                "problemMatcher": [],
+                "group": {"kind": "build", "isDefault": True},
+            }
+        ],
+    },
+}
+
+
+def deep_merge(current: dict, template: dict) -> dict:
+    """Template values win, nested objects are merged and keys only the user has are kept."""
+    merged = dict(current)
+    for key, value in template.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_tasks(current: dict, template: dict) -> dict:
+    """Template tasks replace user tasks with the same label; other user tasks are kept."""
+    merged = deep_merge({k: v for k, v in current.items() if k != "tasks"}, template)
+    tasks = list(template.get("tasks", []))
+    labels = {task.get("label") for task in tasks}
+    tasks += [
+        task
+        for task in current.get("tasks", [])
+        if not isinstance(task, dict) or task.get("label") not in labels
+    ]
+    merged["tasks"] = tasks
+    return merged
+
+
+MERGERS = {"settings.json": deep_merge, "mcp.json": deep_merge, "tasks.json": merge_tasks}
+
+
+def render(data: dict) -> str:
+    return json.dumps(data, indent=4)
+
+
+def write_atomic(file: P, text: str):
+    """Write `text` to a temp file next to `file` and rename it into place."""
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_name(f".{file.name}.daksh-tmp")
+    try:
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, file)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+def merge_config(file: P, name: str, template: dict, dry_run: bool = False) -> str:
+    """Merge `template` into the JSON config at `file`.
+
+    Returns "unchanged" when the merged result is byte-identical to what is
+    on disk (nothing is written), "invalid" when the existing file cannot be
+    parsed (it is left alone), and "updated" otherwise. In `dry_run` mode a
+    unified diff of the pending change is printed instead of writing it.
+    """
+    try:
+        old_text = file.read_text()
+    except FileNotFoundError:
+        old_text = None
+    current = {}
+    if old_text is not None:
+        try:
+            current = json.loads(old_text)
+        except ValueError as e:
+            Info(f"Warning: Not touching {file}, it is not valid JSON: {e}")
+            return "invalid"
+        if not isinstance(current, dict):
+            Info(f"Warning: Not touching {file}, it does not hold a JSON object")
+            return "invalid"
+
+    new_text = render(MERGERS[name](current, template))
+    if new_text == old_text:
+        return "unchanged"
+    if dry_run:
+        diff = difflib.unified_diff(
+            (old_text or "").splitlines(keepends=True),
+            new_text.splitlines(keepends=True),
+            fromfile=f"a/{file}" if old_text is not None else "/dev/null",
+            tofile=f"b/{file}",
+        )
+        print("".join(line if line.endswith("\n") else line + "\n" for line in diff), end="")
+    else:
+        write_atomic(file, new_text)
+    return "updated"
+
+
+def load_templates(read_asset) -> dict[str, dict]:
+    """Parse each template once via `read_asset(rel) -> bytes | None`, falling back when needed."""
+    templates = {}
+    for name, fallback in FALLBACK_TEMPLATES.items():
+        data = read_asset(f"json-files/{name}")
+        if data is None:
+            templates[name] = fallback
+            continue
+        try:
+            templates[name] = json.loads(bytes(data))
+        except ValueError as e:
+            Info(f"Warning: Could not parse template {name}: {e}")
+            templates[name] = fallback
+    return templates
@@ -0,0 +1,5 @@
+"""Messages printed by the daksh commands."""
+
+
+def Info(msg: str):
+    print(f"[INFO] {msg}")
@@ -0,0 +1,191 @@
+"""Content-hash manifest used to sync packaged assets incrementally."""
+
+import hashlib, json, os, stat
+from pathlib import Path as P
+from typing import NamedTuple, Optional
+
+from .bundle import file_mode
+
+MANIFEST = P(".daksh") / ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+class Asset(NamedTuple):
+    src: object  # a file path, or a `bundle.Member` inside the packed assets
+    sha256: str
+    size: int
+    mode: int
+
+
+class Action(NamedTuple):
+    op: str  # one of "write", "chmod", "delete", "keep"
+    dest: str
+    asset: Optional[Asset]
+
+
+def sha256_file(file: P) -> str:
+    h = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def walk_files(folder: P, skip_hidden: bool = True) -> list[P]:
+    """Every file below `folder`, skipping hidden top-level entries like `ls` does."""
+    files = []
+    for entry in sorted(folder.iterdir()):
+        if skip_hidden and entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            files.extend(f for f in sorted(entry.rglob("*")) if f.is_file())
+        elif entry.is_file():
+            files.append(entry)
+    return files
+
+
+def hash_asset(src: P, old_cache: dict, new_cache: dict) -> Asset:
+    """Hash `src`, reusing the cached digest when size and mtime are unchanged."""
+    st = src.stat()
+    key = str(src)
+    cached = old_cache.get(key)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        sha = cached[2]
+    else:
+        sha = sha256_file(src)
+    new_cache[key] = [st.st_size, st.st_mtime_ns, sha]
+    return Asset(src, sha, st.st_size, file_mode(src))
+
+
+def empty_manifest() -> dict:
+    return {"version": MANIFEST_VERSION, "files": {}, "assets": {}}
+
+
+def read_manifest(root: P) -> dict:
+    file = root / MANIFEST
+    if not file.exists():
+        return empty_manifest()
+    try:
+        with open(file, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def write_manifest(root: P, manifest: dict):
+    file = root / MANIFEST
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_name(file.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, file)
+
+
+def file_record(dest: P, sha256: str, link: str = "copy") -> dict:
+    st = dest.stat()
+    return {
+        "sha256": sha256,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "mode": st.st_mode & 0o777,
+        "link": link,
+    }
+
+
+def is_link(st: os.stat_result, asset: Asset, link: str) -> bool:
+    """Whether a file passing `linked_as` is a real link rather than a copy."""
+    return isinstance(asset.src, P) and (link == "symlink" or (link == "hardlink" and st.st_nlink > 1))
+
+
+def linked_as(st: os.stat_result, path: P, asset: Asset, link: str, recorded: str = "copy") -> bool:
+    """Whether the file at `path` is installed the way `link` asks for.
+
+    Links fall back to copies when they cannot be made (a hardlink across
+    filesystems, or any link to an asset in the packed bundle). `recorded` is the `link`
+    the manifest says the file was installed with, so such a copy stays
+    acceptable for as long as the same `link` is asked for.
+    """
+    if link == "symlink" and isinstance(asset.src, P):
+        return stat.S_ISLNK(st.st_mode) and os.readlink(path) == str(asset.src.resolve())
+    if stat.S_ISLNK(st.st_mode):
+        return False
+    if st.st_nlink == 1 or not isinstance(asset.src, P):
+        return link == "copy" or recorded == link
+    src = asset.src.stat()
+    same_inode = (st.st_dev, st.st_ino) == (src.st_dev, src.st_ino)
+    return same_inode == (link == "hardlink")
+
+
+def plan_sync(
+    targets: dict[str, Asset],
+    manifest: dict,
+    root: P,
+    owned_dirs: tuple = (),
+    link: str = "copy",
+) -> list[Action]:
+    """Compare the desired `targets` with what the manifest says is installed.
+
+    Installed files whose size and mtime still match the manifest are trusted
+    without being read, so a run where nothing changed costs one `stat` per file.
+    Files listed in the manifest that are no longer shipped are deleted. When
+    there is no manifest yet, untracked files inside `owned_dirs` are treated
+    as stale leftovers of an older install. Files installed with a different
+    `link` mode than requested are rewritten; copies a link fell back to are
+    checked like any other copy.
+    """
+    installed = manifest["files"]
+    actions = []
+    for dest, asset in targets.items():
+        path = root / dest
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            actions.append(Action("write", dest, asset))
+            continue
+        old = installed.get(dest)
+        if not linked_as(st, path, asset, link, (old or {}).get("link", "copy")):
+            actions.append(Action("write", dest, asset))
+            continue
+        if is_link(st, asset, link):
+            actions.append(Action("keep", dest, asset))
+            continue
+        unchanged = (
+            old is not None
+            and old["sha256"] == asset.sha256
+            and old["size"] == st.st_size
+            and old["mtime_ns"] == st.st_mtime_ns
+        )
+        if not unchanged and (
+            st.st_size != asset.size or sha256_file(path) != asset.sha256
+        ):
+            actions.append(Action("write", dest, asset))
+        elif st.st_mode & 0o777 != asset.mode:
+            actions.append(Action("chmod", dest, asset))
+        else:
+            actions.append(Action("keep", dest, asset))
+
+    stale = set(installed) - set(targets)
+    if not installed:
+        for folder in owned_dirs:
+            if (root / folder).is_dir():
+                stale.update(
+                    f.relative_to(root).as_posix()
+                    for f in (root / folder).rglob("*")
+                    if f.is_file() and f != root / MANIFEST
+                )
+        stale -= set(targets)
+    for dest in sorted(stale):
+        if os.path.lexists(root / dest):
+            actions.append(Action("delete", dest, None))
+    return actions
+
+
+def prune_empty_dirs(root: P, dest: str):
+    """Remove directories emptied by deleting `dest`, stopping at `root`."""
+    folder = (root / dest).parent
+    while folder != root and folder.is_dir() and not any(folder.iterdir()):
+        folder.rmdir()
+        folder = folder.parent
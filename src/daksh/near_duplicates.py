@@ -0,0 +1,109 @@
+"""Near-duplicate clustering and support ranking of extracted statements."""
+
+import itertools, re
+
+import numpy as np
+
+SHINGLE = 5  # bytes per shingle
+BANDS, ROWS = 16, 4  # LSH bands of the MinHash signature and rows per band
+SIMILARITY = 0.6  # estimated Jaccard similarity above which two lines are one statement
+BLOCK = 50_000  # lines signed at once, bounding the temporary arrays
+
+
+def normalize(line: str) -> bytes:
+    """The lowercased words of `line`, padded to at least one shingle."""
+    return " ".join(re.findall(r"\w+", line.lower())).encode("utf-8").ljust(SHINGLE)
+
+
+def shingle_hashes(texts: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """32-bit hashes of every `SHINGLE`-byte window of `texts`, and where each text's hashes start."""
+    lengths = np.fromiter(map(len, texts), np.int64, len(texts))
+    data = np.frombuffer(b"".join(texts), np.uint8)
+    windows = len(data) - SHINGLE + 1
+    hashes = np.zeros(windows, np.uint32)
+    for k in range(SHINGLE):
+        hashes = hashes * np.uint32(16777619) + data[k : k + windows]
+
+    # Drop the windows that straddle two texts
+    counts = lengths - SHINGLE + 1
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) - starts
+    return hashes[np.arange(counts.sum()) + np.repeat(offsets, counts)], starts
+
+
+def minhash(texts: list[bytes]) -> np.ndarray:
+    """MinHash signatures of `texts`, one row of `BANDS * ROWS` values per text.
+
+    Each value is the minimum over a text's shingles of a multiply-shift
+    hash `(a * x + b) >> 32`, which needs no division.
+    """
+    rng = np.random.default_rng(0)
+    a = rng.integers(0, 2**64, BANDS * ROWS, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**64, BANDS * ROWS, dtype=np.uint64)
+    signatures = np.empty((len(texts), BANDS * ROWS), np.uint32)
+    for first in range(0, len(texts), BLOCK):
+        hashes, starts = shingle_hashes(texts[first : first + BLOCK])
+        hashes = hashes.astype(np.uint64)
+        for j in range(BANDS * ROWS):
+            permuted = (a[j] * hashes + b[j]) >> np.uint64(32)
+            signatures[first : first + len(starts), j] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def cluster_labels(signatures: np.ndarray) -> np.ndarray:
+    """Label each signature with the lowest index of its cluster of near-duplicates.
+
+    Rows that agree on every value of some band are candidates, kept when
+    their signatures agree on at least `SIMILARITY` of all values; clusters
+    are the connected components of the kept pairs. Only rows sharing a
+    bucket are compared, so the cost grows with n log n rather than n².
+    """
+    n = len(signatures)
+    pairs = []
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(signatures[:, band * ROWS : (band + 1) * ROWS])
+        _, first, inverse = np.unique(
+            keys.view(np.dtype((np.void, keys.itemsize * ROWS))).ravel(), return_index=True, return_inverse=True
+        )
+        leader = first[inverse.ravel()]
+        members = np.flatnonzero(leader != np.arange(n))
+        pairs.append((members, leader[members]))
+    a = np.concatenate([p[0] for p in pairs])
+    b = np.concatenate([p[1] for p in pairs])
+    similar = (signatures[a] == signatures[b]).mean(axis=1) >= SIMILARITY
+    a, b = a[similar], b[similar]
+
+    labels = np.arange(n)
+    while True:
+        merged = labels.copy()
+        np.minimum.at(merged, a, labels[b])
+        np.minimum.at(merged, b, labels[a])
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            return labels
+        labels = merged
+
+
+def rank_statements(lines: list[str], documents: list[list[int]]) -> list[str]:
+    """One line per cluster of near-duplicate `lines`, the best supported clusters first.
+
+    `documents[i]` lists the documents `lines[i]` was found in. A cluster's
+    support is the number of documents containing any of its lines, and it
+    is represented by its own best supported line. Ties go to the line seen
+    first, so the order does not depend on anything but the input.
+    """
+    n = len(lines)
+    if n == 0:
+        return []
+    labels = cluster_labels(minhash([normalize(line) for line in lines]))
+    counts = np.fromiter(map(len, documents), np.int64, n)
+    docs = np.fromiter(itertools.chain.from_iterable(documents), np.int64, counts.sum())
+    width = int(docs.max()) + 1 if len(docs) else 1
+    cluster_docs = np.unique(np.repeat(labels, counts) * width + docs)
+    support = np.bincount(cluster_docs // width, minlength=n)
+
+    index = np.arange(n)
+    order = np.lexsort((index, -counts, labels))
+    best = order[np.concatenate(([True], labels[order][1:] != labels[order][:-1]))]
+    ranked = best[np.lexsort((labels[best], -support[labels[best]]))]
+    return [lines[i] for i in ranked]
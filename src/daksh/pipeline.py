@@ -0,0 +1,146 @@
+"""Convert documents and extract the product vision in one streaming pass."""
+
+import contextlib, io, os, time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path as P
+
+import typer
+
+from .__pre_init__ import cli
+from .console import Info
+from .vision import DEFAULT_JOBS, create_vision_md, extract_text, merge_key_points
+
+# Read as they are; everything else goes through MarkItDown
+TEXT_SUFFIXES = {".md", ".markdown", ".txt"}
+
+# Set once per worker process by `init_worker`
+_converter = None
+
+
+def init_worker():
+    """Load MarkItDown once per worker, if it is installed."""
+    global _converter
+    try:
+        from markitdown import MarkItDown
+    except ImportError:
+        return
+    _converter = MarkItDown()
+
+
+def find_documents(root: P, skip: P = None) -> list[P]:
+    """Files below `root`, sorted, leaving out hidden ones and the folder `skip`."""
+    skip = skip and skip.resolve()
+    documents = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames if not d.startswith(".") and P(dirpath, d).resolve() != skip
+        )
+        documents.extend(P(dirpath, f) for f in sorted(filenames) if not f.startswith("."))
+    return documents
+
+
+def markdown_names(root: P, documents: list[P]) -> list[P]:
+    """Where each document's markdown goes, relative to the markdown folder.
+
+    `<stem>.md`, except when documents in one folder share a stem
+    (`notes.pdf`, `notes.docx`): those get `<name>.md` so none is overwritten.
+    """
+    stems = Counter((d.parent, d.stem) for d in documents)
+    return [
+        d.relative_to(root).with_name(f"{d.name}.md" if stems[d.parent, d.stem] > 1 else f"{d.stem}.md")
+        for d in documents
+    ]
+
+
+def convert_and_extract(document: str, markdown_path: str = None) -> dict:
+    """Convert one document to markdown in memory and extract its key points."""
+    start = time.perf_counter()
+    result = {"document": document, "points": None, "error": None}
+    try:
+        if P(document).suffix.lower() in TEXT_SUFFIXES:
+            with open(document, "r", encoding="utf-8") as f:
+                text = f.read()
+        elif _converter is None:
+            raise RuntimeError("MarkItDown is not installed, only markdown and text files can be read")
+        else:
+            # Converters print progress that would garble ours
+            with contextlib.redirect_stdout(io.StringIO()):
+                text = _converter.convert(document).text_content
+        if markdown_path:
+            os.makedirs(os.path.dirname(markdown_path), exist_ok=True)
+            with open(markdown_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        result["points"] = extract_text(text)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def stream_results(function, args: list[tuple], jobs: int):
+    """Yield `function(*a)` for each of `args`, in order, as soon as each is done.
+
+    At most two tasks per worker are in flight, so results never pile up in
+    memory ahead of the consumer.
+    """
+    jobs = min(jobs, len(args))
+    if jobs <= 1:
+        init_worker()
+        yield from (function(*a) for a in args)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+        pending = deque()
+        for a in args:
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+            pending.append(pool.submit(function, *a))
+        while pending:
+            yield pending.popleft().result()
+
+
+@cli.command()
+def pipeline(
+    source_dir: P = typer.Argument(..., help="Folder with the source documents."),
+    output: P = typer.Option(
+        P("docs/specifications/business/vision.md"), "--output", "-o", help="Where to write vision.md."
+    ),
+    markdown_dir: P = typer.Option(
+        None, help="Also write each converted document to this folder as markdown."
+    ),
+    jobs: int = typer.Option(None, help="Number of documents converted in parallel (default: one per CPU)."),
+    update_every: float = typer.Option(
+        10, help="Rewrite vision.md from the documents done so far every this many seconds; 0 only at the end."
+    ),
+):
+    """Convert documents and generate vision.md in one pass."""
+    if not source_dir.is_dir():
+        raise typer.BadParameter(f"{source_dir} is not a folder", param_hint="SOURCE_DIR")
+    start = time.perf_counter()
+    documents = find_documents(source_dir, skip=markdown_dir)
+    documents = [d for d in documents if d.resolve() != output.resolve()]
+    Info(f"Converting {len(documents)} documents from {source_dir}")
+    if markdown_dir:
+        markdown_paths = [str(markdown_dir / name) for name in markdown_names(source_dir, documents)]
+    else:
+        markdown_paths = [None] * len(documents)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    partials, failed = [], 0
+    last_update = time.perf_counter()
+    args = [(str(d), m) for d, m in zip(documents, markdown_paths)]
+    for done, result in enumerate(stream_results(convert_and_extract, args, jobs or DEFAULT_JOBS), 1):
+        if result["error"]:
+            failed += 1
+            Info(f"[{done}/{len(documents)}] failed: {result['document']} ({result['error']})")
+            continue
+        Info(f"[{done}/{len(documents)}] done: {result['document']} ({result['seconds']:.2f}s)")
+        partials.append(result["points"])
+        if update_every and time.perf_counter() - last_update >= update_every and done < len(documents):
+            create_vision_md(merge_key_points(partials), output)
+            last_update = time.perf_counter()
+
+    create_vision_md(merge_key_points(partials), output)
+    Info(
+        f"{len(partials)} documents converted, {failed} failed in {time.perf_counter() - start:.2f}s"
+    )
@@ -1,259 +1,285 @@
-import shutil, json, os
+import os, sys
 from datetime import datetime
 from pathlib import Path as P
+import typer
 from .__pre_init__ import cli
+from .bundle import BUNDLE_NAME, members, read_member
+from .config_merge import load_templates, merge_config
+from .console import Info
+from .installer import LINK_MODES, fast_copy, install_files
+from .manifest import (
+    Asset,
+    file_record,
+    hash_asset,
+    plan_sync,
+    prune_empty_dirs,
+    read_manifest,
+    walk_files,
+    write_manifest,
+)
 
 
 def current_file_dir(file: str) -> str:
     return P(file).parent.resolve()
 
 
-def ls(folder: P) -> list[P]:
-    return [f for f in folder.iterdir() if not f.name.startswith(".")]
+# Packaged files installed verbatim: (asset path, destination relative to the repo root)
+INSTALLED_FILES = [
+    ("copilot-instructions.md", ".github/copilot-instructions.md"),
+    ("mkdocs.yml", "mkdocs.yml"),
+    ("mkdocs_deps.txt", "mkdocs_deps.txt"),
+    ("run-mkdocs.sh", "run-mkdocs.sh"),
+    ("extra.css", "docs/overrides/extra.css"),
+]
 
+# Packaged folders mirrored into the repo: (asset folder, destination, skip hidden entries)
+INSTALLED_TREES = [
+    ("daksh-prompts", ".daksh", True),
+    ("overrides", "overrides", False),
+]
 
-def Info(msg: str):
-    print(f"[INFO] {msg}")
-
-
-def read_json(file: P) -> dict:
-    with open(file, "r") as f:
-        return json.load(f)
-
-
-def write_json(file: P, data: dict):
-    if not file.parent.exists():
-        file.parent.mkdir(parents=True, exist_ok=True)
-    with open(file, "w") as f:
-        json.dump(data, f, indent=4)
-
-
-def read_lines(file: P) -> list[str]:
-    with open(file, "r") as f:
-        return f.readlines()
-
-
-def append_lines(file: P, lines: list[str]):
-    if not file.parent.exists():
-        file.parent.mkdir(parents=True, exist_ok=True)
-    if not file.exists():
-        with open(file, "w") as f:
-            pass
-    with open(file, "a") as f:
-        f.writelines(lines)
-
-
-@cli.command()
-def update_prompts(dry_run: bool = False):
-    # Track files that are created/copied
-    added_files = []
-
-    def copy(src_fldr: P, dst_fldr: P):
-        for f in ls(src_fldr):
-            to = dst_fldr / f.name
-            Info(f"Updating {f} to {to}")
-
-            if dry_run:
-                continue
-
-            if f.is_file():
-                shutil.copy(f, to)
-                added_files.append(str(to))
-            elif f.is_dir():
-                shutil.copytree(f, to, dirs_exist_ok=True)
-                added_files.append(str(to))
 
+def resolve_assets_dir() -> P:
     # Try local assets first (for packaged version), then fall back to root assets (for development)
     cwd = current_file_dir(__file__)
     local_assets = cwd / "assets"
     root_assets = cwd.parent.parent / "assets"
 
     if root_assets.exists():
-        assets_dir = root_assets
         Info("Using development assets from project root")
+        return root_assets
     elif local_assets.exists():
-        assets_dir = local_assets
         Info("Using packaged assets")
-    else:
-        raise FileNotFoundError(
-            "Assets directory not found in either local or root location"
-        )
-
-    # Remove existing .daksh folder before copying
-    daksh_dest = P(".daksh")
-    if daksh_dest.exists():
-        Info("Removing existing .daksh folder")
-        if not dry_run:
-            shutil.rmtree(daksh_dest)
-
-    copy(assets_dir / "daksh-prompts", daksh_dest)
-
-    # Update .vscode/settings.json using template
-    settings_path = P(".vscode/settings.json")
-    settings_template = assets_dir / "json-files" / "settings.json"
-    
-    if settings_path.exists():
-        settings = read_json(settings_path)
-    else:
-        settings = {}
-    
-    # Read template settings and merge
-    if settings_template.exists():
-        try:
-            template_settings = read_json(settings_template)
-            settings.update(template_settings)
-        except Exception as e:
-            Info(f"Warning: Could not parse template settings.json: {e}")
-    else:
-        # Fallback to manual construction if template doesn't exist
-        chat_mode_files_locations = settings.get("chat.modeFilesLocations", {})
-        chat_mode_files_locations[".daksh/prompts/**/"] = True
-        settings["chat.modeFilesLocations"] = chat_mode_files_locations
-    
-    if not dry_run:
-        write_json(settings_path, settings)
-    added_files.append(str(settings_path))
-
-    # Update .vscode/mcp.json using template
-    mcp_path = P(".vscode/mcp.json")
-    mcp_template = assets_dir / "json-files" / "mcp.json"
-    
-    if mcp_path.exists():
-        mcp_config = read_json(mcp_path)
-    else:
-        mcp_config = {"servers": {}}
-    
-    # Read template mcp.json and merge servers
-    if mcp_template.exists():
-        try:
-            template_mcp = read_json(mcp_template)
-            if "servers" not in mcp_config:
-                mcp_config["servers"] = {}
-            # Merge servers from template
-            mcp_config["servers"].update(template_mcp.get("servers", {}))
-        except Exception as e:
-            Info(f"Warning: Could not parse template mcp.json: {e}")
-    
-    if not dry_run:
-        write_json(mcp_path, mcp_config)
-    added_files.append(str(mcp_path))
-
-    if os.path.exists(".github/copilot-instructions.md"):
-        if (
-            input(
-                "Found an existing .github/copilot-instructions.md should we back it up? [y/N]: "
-            ).lower()
-            != "y"
-        ):
-            Info("Skipping backup")
-        else:
-            bkp = f".github/copilot-instructions.md.bak.{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            Info(f"Backing up existing .github/copilot-instructions.md to {bkp}")
-            shutil.copy(".github/copilot-instructions.md", bkp)
-            added_files.append(bkp)
-    if not os.path.exists(".github"):
-        os.makedirs(".github")
-    shutil.copy(
-        assets_dir / "copilot-instructions.md", ".github/copilot-instructions.md"
+        return local_assets
+    raise FileNotFoundError(
+        "Assets directory not found in either local or root location"
     )
-    added_files.append(".github/copilot-instructions.md")
 
-    shutil.copy(assets_dir / "mkdocs.yml", "mkdocs.yml")
-    added_files.append("mkdocs.yml")
 
-    shutil.copy(assets_dir / "mkdocs_deps.txt", "mkdocs_deps.txt")
-    added_files.append("mkdocs_deps.txt")
-
-    shutil.copy(assets_dir / "run-mkdocs.sh", "run-mkdocs.sh")
-    added_files.append("run-mkdocs.sh")
-
-    # shutil.copy(assets_dir / "mcp_deps.txt", "mcp_deps.txt")
-    # added_files.append("mcp_deps.txt")
+def read_asset(assets_dir: P, rel: str) -> bytes:
+    """Contents of the asset at `rel`, from the packed bundle when there is one."""
+    bundle = assets_dir.parent / BUNDLE_NAME
+    if bundle.exists():
+        found = members(bundle).get(rel)
+        return read_member(found[0]) if found else None
+    file = assets_dir / rel
+    return file.read_bytes() if file.exists() else None
+
+
+def index_assets(
+    assets_dir: P, old_cache: dict = None, link: str = "copy"
+) -> tuple[dict[str, Asset], dict]:
+    """Hash the packaged assets once: `(targets, digest cache)` for `sync_assets`.
+
+    When a packed bundle ships next to `assets_dir` its index already holds
+    every size, mode and hash, so nothing is walked or read. Links need real
+    files to point at, so they always use the loose assets.
+    """
+    bundle = assets_dir.parent / BUNDLE_NAME
+    if link == "copy" and bundle.exists():
+        return bundle_targets(bundle), {}
+    new_cache = {}
+    return asset_targets(assets_dir, old_cache or {}, new_cache), new_cache
+
+
+def asset_destination(rel: str) -> str:
+    """Where the asset at `rel` (relative to the assets folder) is installed, if at all."""
+    for src, dest in INSTALLED_FILES:
+        if rel == src:
+            return dest
+    top, _, rest = rel.partition("/")
+    for src_fldr, dst_fldr, skip_hidden in INSTALLED_TREES:
+        if top == src_fldr and rest and not (skip_hidden and rest.startswith(".")):
+            return f"{dst_fldr}/{rest}"
+    return None
+
+
+def bundle_targets(bundle: P) -> dict[str, Asset]:
+    targets = {}
+    for rel, (member, entry) in members(bundle).items():
+        dest = asset_destination(rel)
+        if dest is not None:
+            targets[dest] = Asset(member, entry["sha256"], entry["size"], entry["mode"])
+    return targets
+
+
+def asset_targets(assets_dir: P, old_cache: dict, new_cache: dict) -> dict[str, Asset]:
+    """Map every destination path we manage to the packaged asset it comes from."""
+    targets = {}
+    for src_fldr, dst_fldr, skip_hidden in INSTALLED_TREES:
+        src_fldr = assets_dir / src_fldr
+        if not src_fldr.exists():
+            continue
+        for f in walk_files(src_fldr, skip_hidden):
+            dest = (P(dst_fldr) / f.relative_to(src_fldr)).as_posix()
+            targets[dest] = hash_asset(f, old_cache, new_cache)
+    for src, dest in INSTALLED_FILES:
+        if (assets_dir / src).exists():
+            targets[dest] = hash_asset(assets_dir / src, old_cache, new_cache)
+    return targets
+
+
+BACKUP_POLICIES = ("ask", "always", "never")
+
+
+def backup_copilot_instructions(root: P, policy: str = "ask") -> list[str]:
+    if policy == "ask" and not sys.stdin.isatty():
+        policy = "never"
+    if policy == "ask":
+        answer = input(
+            "Found an existing .github/copilot-instructions.md should we back it up? [y/N]: "
+        )
+        policy = "always" if answer.lower() == "y" else "never"
+    if policy == "never":
+        Info("Skipping backup")
+        return []
+    bkp = f".github/copilot-instructions.md.bak.{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    Info(f"Backing up existing .github/copilot-instructions.md to {bkp}")
+    fast_copy(root / ".github/copilot-instructions.md", root / bkp)
+    return [bkp]
+
+
+def sync_assets(
+    assets_dir: P,
+    root: P,
+    dry_run: bool = False,
+    link: str = "copy",
+    backup: str = "ask",
+    index: tuple = None,
+) -> dict[str, list[str]]:
+    """Bring the files installed under `root` in line with `assets_dir`.
+
+    Only files whose content or mode differs from the packaged assets are
+    touched; `.daksh/.manifest.json` records what was installed so the next
+    run can skip reading anything that has not changed. With `link` set to
+    "hardlink" or "symlink" files point at the packaged assets instead of
+    being copied. `index` is a precomputed `index_assets` result, so batch
+    runs hash the assets once rather than once per repository.
+    """
+    manifest = read_manifest(root)
+    targets, new_cache = index or index_assets(assets_dir, manifest["assets"], link)
+    actions = plan_sync(targets, manifest, root, owned_dirs=(".daksh",), link=link)
+
+    changes = {"written": [], "chmod": [], "deleted": [], "backups": []}
+    for action in actions:
+        if action.op == "keep":
+            continue
+        Info(f"{action.op.capitalize()} {action.dest}")
+        if action.op == "write" and action.dest == ".github/copilot-instructions.md":
+            if (root / action.dest).exists() and not dry_run:
+                changes["backups"] += backup_copilot_instructions(root, backup)
+        changes[{"write": "written", "chmod": "chmod", "delete": "deleted"}[action.op]].append(action.dest)
+
+    if dry_run:
+        return changes
+
+    for action in actions:
+        if action.op == "delete":
+            os.unlink(root / action.dest)
+            prune_empty_dirs(root, action.dest)
+        elif action.op == "chmod":
+            os.chmod(root / action.dest, action.asset.mode)
+    modes = {root / a.dest: a.asset.mode for a in actions if a.op == "write"}
+    install_files(
+        [(a.asset.src, root / a.dest) for a in actions if a.op == "write"],
+        link=link,
+        mode_of=modes.get,
+    )
 
+    files = {
+        a.dest: file_record(root / a.dest, a.asset.sha256, link)
+        for a in actions
+        if a.op != "delete"
+    }
+    if files != manifest["files"] or new_cache != manifest["assets"]:
+        manifest.update(files=files, assets=new_cache)
+        write_manifest(root, manifest)
+    return changes
+
+
+def update_repo(
+    assets_dir: P,
+    root: P,
+    dry_run: bool = False,
+    link: str = "copy",
+    backup: str = "ask",
+    index: tuple = None,
+    templates: dict = None,
+) -> tuple[list[str], list[str]]:
+    """Install prompts and editor configuration into the repository at `root`.
+
+    Returns the files added or updated and the files removed, relative to `root`.
+    `index` and `templates` let batch runs pass in assets prepared once.
+    """
+    # Track files that are created/copied
+    added_files = []
 
-    os.makedirs("docs/overrides", exist_ok=True)
-    shutil.copy(assets_dir / "extra.css", "docs/overrides/extra.css")
-    added_files.append("docs/overrides/extra.css")
+    changes = sync_assets(assets_dir, root, dry_run, link, backup, index)
+    added_files += changes["backups"] + changes["written"] + changes["chmod"]
+    removed_files = changes["deleted"]
 
-    shutil.copytree(assets_dir / "overrides", "./overrides", dirs_exist_ok=True)
-    added_files.append("./overrides")
+    # Merge the .vscode JSON templates, writing only files whose content changes
+    if templates is None:
+        templates = load_templates(lambda rel: read_asset(assets_dir, rel))
+    for name in ("settings.json", "mcp.json", "tasks.json"):
+        status = merge_config(root / ".vscode" / name, name, templates[name], dry_run)
+        if status == "updated":
+            added_files.append(f".vscode/{name}")
 
     # # Copy fastMcp folder
     # if not dry_run:
     #     shutil.copytree(assets_dir / "fastMcp", "./fastMcp", dirs_exist_ok=True)
     # added_files.append("./fastMcp")
 
-    if not os.path.exists("docs/index.md"):
-        shutil.copy(assets_dir / "index.md", "docs/index.md")
+    if not (root / "docs/index.md").exists():
+        if not dry_run:
+            os.makedirs(root / "docs", exist_ok=True)
+            fast_copy(assets_dir / "index.md", root / "docs/index.md")
         added_files.append("docs/index.md")
 
-    # Ensure mkdocs helper files (if present in assets) are copied
-    for helper in ["mkdocs_deps.txt", "run-mkdocs.sh"]:
-        src_helper = assets_dir / helper
-        if src_helper.exists():
-            Info(f"Adding helper asset {src_helper} -> {helper}")
-            if not dry_run:
-                shutil.copy(src_helper, helper)
-                if helper.endswith('.sh'):
-                    os.chmod(helper, 0o755)
-            added_files.append(helper)
-
-    # Create or update .vscode/tasks.json using template
-    tasks_json_path = P('.vscode/tasks.json')
-    tasks_template = assets_dir / "json-files" / "tasks.json"
-    
-    if tasks_json_path.exists():
-        try:
-            existing_tasks = read_json(tasks_json_path)
-        except Exception:
-            existing_tasks = {"version": "2.0.0", "tasks": []}
-    else:
-        existing_tasks = {"version": "2.0.0", "tasks": []}
-    
-    # Read template tasks.json and use it as base
-    if tasks_template.exists():
-        try:
-            template_tasks = read_json(tasks_template)
-            # Use template as base, but preserve any existing custom tasks if needed
-            final_tasks = template_tasks
-        except Exception as e:
-            Info(f"Warning: Could not parse template tasks.json: {e}")
-            # Fallback to manual construction
-            final_tasks = {
-                "version": "2.0.0",
-                "tasks": [
-                    {
-                        "label": "Run MkDocs",
-                        "type": "shell",
-                        "command": "chmod +x ./run-mkdocs.sh && ./run-mkdocs.sh",
-                        "problemMatcher": [],
-                        "group": {"kind": "build", "isDefault": True},
-                    }
-                ],
-            }
-    else:
-        # Fallback to manual construction if template doesn't exist
-        final_tasks = {
-            "version": "2.0.0",
-            "tasks": [
-                {
-                    "label": "Run MkDocs",
-                    "type": "shell",
-                    "command": "chmod +x ./run-mkdocs.sh && ./run-mkdocs.sh",
-                    "problemMatcher": [],
-                    "group": {"kind": "build", "isDefault": True},
-                }
-            ],
-        }
-    
-    if not dry_run:
-        if not tasks_json_path.parent.exists():
-            tasks_json_path.parent.mkdir(parents=True, exist_ok=True)
-        write_json(tasks_json_path, final_tasks)
-    added_files.append(str(tasks_json_path))
+    return added_files, removed_files
+
+
+@cli.command()
+def update_prompts(
+    dry_run: bool = False,
+    link: str = typer.Option(
+        "copy",
+        help="How to install prompt files: copy, or hardlink/symlink to the packaged assets.",
+    ),
+    backup: str = typer.Option(
+        "ask",
+        help="Back up a replaced .github/copilot-instructions.md: ask, always or never. "
+        "'ask' means 'never' when stdin is not a terminal.",
+    ),
+    workspace: P = typer.Option(
+        None,
+        help="Update every git repository found under this folder instead of the current one.",
+    ),
+    jobs: int = typer.Option(
+        None, help="Number of repositories to update in parallel with --workspace."
+    ),
+):
+    """Install or update the daksh prompts and editor configuration."""
+    if link not in LINK_MODES:
+        raise typer.BadParameter(f"must be one of {', '.join(LINK_MODES)}", param_hint="--link")
+    if backup not in BACKUP_POLICIES:
+        raise typer.BadParameter(f"must be one of {', '.join(BACKUP_POLICIES)}", param_hint="--backup")
+
+    assets_dir = resolve_assets_dir()
+
+    if workspace is not None:
+        from .workspace import update_workspace
+
+        update_workspace(assets_dir, workspace, dry_run, link, backup, jobs)
+        return
+
+    added_files, removed_files = update_repo(assets_dir, P("."), dry_run, link, backup)
 
     # Display summary of added files
     print("\n📁 Files added to current working directory:")
     for file in added_files:
         print(f"   ✓ {file}")
-    print(f"\nTotal: {len(added_files)} files/directories added or updated\n")
+    for file in removed_files:
+        print(f"   ✗ {file}")
+    print(f"\nTotal: {len(added_files)} files/directories added or updated, {len(removed_files)} removed\n")
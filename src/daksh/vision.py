@@ -0,0 +1,389 @@
+"""Generate `vision.md` from converted markdown documents."""
+
+import json, os, re, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path as P
+
+import typer
+
+from .__pre_init__ import cli
+from .console import Info
+from .manifest import sha256_file
+from .near_duplicates import rank_statements
+
+DEFAULT_JOBS = os.cpu_count() or 1
+
+# Keywords that put a line of a document into a section of the vision
+KEYWORDS = {
+    "problems": ["problem", "challenge", "pain point", "issue", "difficulty"],
+    "features": ["feature", "capability", "function", "component"],
+    "goals": ["goal", "objective", "success", "metric", "KPI", "outcome"],
+    "scope": ["scope", "boundary", "limit", "constraint"],
+    "differentiators": ["differentiator", "unique", "advantage", "competitive"],
+    # Not sections: negations keep a line out of problems and put scope out,
+    # and goals need a measurable change
+    "negation": ["not", "shouldn't"],
+    "change": ["%", "increase", "reduce"],
+}
+
+
+def keyword_regex(words) -> str:
+    """An alternation of `words` factored into a trie, e.g. `c(?:hallenge|o(?:mponent|nstraint))`.
+
+    The engine then settles each position on one character instead of
+    trying every word, and the longest word wins where several start.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        if "" not in node and len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:%s)%s" % ("|".join(alternatives), "?" if "" in node else "")
+
+    return build(trie)
+
+
+def keyword_matcher(groups: dict):
+    """Compile `groups` of keywords into a function returning the groups found in a text.
+
+    One regex scans the text and each match resumes one character later, so
+    overlapping keywords are all seen. A match is the longest keyword at its
+    position, which also stands for every shorter keyword it starts with.
+    Matching is case-sensitive, so callers lowercase the text.
+    """
+    words = {word for group in groups.values() for word in group}
+    implies = {
+        word: frozenset(name for name, group in groups.items() if any(word.startswith(k) for k in group))
+        for word in words
+    }
+    search = re.compile(keyword_regex(words)).search
+
+    def match(text):
+        found = set()
+        hit = search(text)
+        while hit:
+            found |= implies[hit.group()]
+            hit = search(text, hit.start() + 1)
+        return found
+
+    return match
+
+
+classify_line = keyword_matcher(KEYWORDS)
+
+
+# Lists of lines collected from each file, besides the user types
+SECTIONS = ("problems", "features", "requirements", "goals", "scope_in", "scope_out", "differentiators")
+
+
+def extract_text(content: str) -> dict:
+    """The key points of one markdown document, each list in first-seen order."""
+    # Dicts keep the first occurrence of each line, in order
+    found = {key: {} for key in ("user_types",) + SECTIONS}
+
+    # Extract user stories
+    user_stories = re.findall(r"As an? ([^,]+)", content, re.IGNORECASE)
+    user_stories.extend(re.findall(r"As a ([^,]+)", content, re.IGNORECASE))
+
+    for user in user_stories:
+        if len(user.split()) <= 3:  # Avoid capturing entire sentences
+            found["user_types"][user.strip()] = None
+
+    # Extract requirements as potential features
+    req_blocks = re.findall(r"(?:REQ|TASK|MEET)-\d+[^\n]+", content)
+    for req in req_blocks:
+        clean_req = re.sub(r"(?:REQ|TASK|MEET)-\d+\s*", "", req).strip()
+        if clean_req and len(clean_req) > 10:  # Avoid short fragments
+            found["requirements"][clean_req] = None
+
+    # Sort each line into every section whose keywords it contains
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#') or len(line) < 15:
+            continue
+        keywords = classify_line(line.lower())
+        if not keywords:
+            continue
+        negated = "negation" in keywords
+
+        if "problems" in keywords and not negated:
+            found["problems"][line] = None
+        if "features" in keywords and len(line) < 200:
+            found["features"][line] = None
+        if "goals" in keywords and "change" in keywords:
+            found["goals"][line] = None
+        if "scope" in keywords:
+            found["scope_out" if negated else "scope_in"][line] = None
+        if "differentiators" in keywords:
+            found["differentiators"][line] = None
+
+    return {key: list(items) for key, items in found.items()}
+
+
+def extract_file(file_path) -> dict:
+    """Map step: `extract_text` of one markdown file."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return extract_text(f.read())
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return extract_text("")
+
+
+def merge_key_points(partials) -> dict:
+    """Reduce step: combine `extract_file` results and rank each section with `rank_statements`.
+
+    Partials count as documents in the order given, so near-duplicates
+    collapse and ties break the same way for any number of workers.
+    """
+    merged = {key: {} for key in ("user_types",) + SECTIONS}
+    for document, partial in enumerate(partials):
+        for key, items in partial.items():
+            section = merged[key]
+            for item in items:
+                section.setdefault(item, []).append(document)
+    ranked = {key: rank_statements(list(found), list(found.values())) for key, found in merged.items()}
+    return {
+        "problems": ranked["problems"],
+        "features": ranked["features"],
+        "user_types": ranked["user_types"],
+        "requirements": ranked["requirements"],
+        "goals": ranked["goals"],
+        "scope": {"in": ranked["scope_in"], "out": ranked["scope_out"]},
+        "differentiators": ranked["differentiators"],
+    }
+
+
+def map_files(function, files: list, jobs: int = None):
+    """Yield `function(file)` for each of `files`, in order, computed on a process pool."""
+    jobs = min(jobs or DEFAULT_JOBS, len(files))
+    if jobs <= 1:
+        yield from map(function, files)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(function, files, chunksize=max(1, len(files) // (jobs * 4)))
+
+
+def extract_key_points(markdown_files, jobs: int = None) -> dict:
+    """Extract key information from converted markdown files to build a vision document.
+
+    Files are read on a pool of `jobs` processes (default: one per CPU) and
+    merged in the order of `markdown_files`, so the result is the same for
+    any number of workers.
+    """
+    return merge_key_points(map_files(extract_file, list(markdown_files), jobs))
+
+
+CACHE_FILE = ".vision-cache.json"
+# Bumped whenever `extract_file` changes what it finds, so cached results are redone
+CACHE_VERSION = 1
+
+
+def scan_file(file_path: str) -> dict:
+    """`extract_file` plus the size, mtime and hash that tell when its result is stale."""
+    st = os.stat(file_path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256_file(P(file_path)),
+        "points": extract_file(file_path),
+    }
+
+
+def read_cache(file: P) -> dict:
+    try:
+        with open(file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def write_cache(file: P, files: dict):
+    tmp = file.with_name(file.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f)
+    os.replace(tmp, file)
+
+
+def extract_incremental(
+    root: P, markdown_files: list[P], cache_file: P, jobs: int = None
+) -> tuple[dict, dict]:
+    """`extract_key_points` that only re-scans the files changed since the last run.
+
+    The per-file results are cached in `cache_file` by path relative to
+    `root`. A file is reused when its size and mtime are unchanged, or else
+    when its content hash is; new and changed files are scanned on the
+    pool and deleted ones are dropped. Returns the key points and how many
+    files were reused, scanned and dropped.
+    """
+    old = read_cache(cache_file)
+    keys = [f.relative_to(root).as_posix() for f in markdown_files]
+    entries, stale, touched = {}, [], False
+    for key, file in zip(keys, markdown_files):
+        entry = old.get(key)
+        st = file.stat()
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            entries[key] = entry
+        elif entry and entry["size"] == st.st_size and entry["sha256"] == sha256_file(file):
+            entries[key] = dict(entry, mtime_ns=st.st_mtime_ns)
+            touched = True
+        else:
+            stale.append(key)
+    entries.update(zip(stale, map_files(scan_file, [str(root / key) for key in stale], jobs)))
+
+    dropped = len(old.keys() - entries.keys())
+    if stale or dropped or touched:
+        write_cache(cache_file, entries)
+    data = merge_key_points(entries[key]["points"] for key in keys)
+    return data, {"reused": len(keys) - len(stale), "scanned": len(stale), "dropped": dropped}
+
+
+def find_markdown(root: P, exclude: P = None) -> list[P]:
+    """Markdown files below `root`, sorted, leaving out `exclude` (e.g. the vision itself)."""
+    exclude = exclude and exclude.resolve()
+    return sorted(f for f in root.rglob("*.md") if f.is_file() and f.resolve() != exclude)
+
+
+def generate_vision_statement(data):
+    """Generate a vision statement from the extracted data."""
+    features = data["features"][:3]  # Take top 3 features
+    user_types = list(data["user_types"])[:2]  # Take top 2 user types
+
+    if features and user_types:
+        vision = f"To create an intelligent, context-aware system that helps {' and '.join(user_types)} "
+        vision += f"manage {', '.join(f for f in features if len(f) < 50)[:100]} "
+        vision += "using automation, AI suggestions, and structured workflows."
+        return vision
+    else:
+        return "To create an intelligent, context-aware task and meeting management system that helps enterprise users work more efficiently through automation, contextual awareness, and structured workflows."
+
+def create_vision_md(data, output_path):
+    """Create the vision.md file with the extracted information."""
+
+    vision_statement = generate_vision_statement(data)
+
+    # Format user types/personas
+    user_personas = "\n\n".join([f"- **{user.title()}**: Interacts with the system to manage tasks, meetings, and related workflows."
+                               for user in list(data["user_types"])[:5]])
+
+    # Format problem statements
+    problems = "\n\n".join([f"- {problem}" for problem in data["problems"][:5]])
+
+    # Format features
+    features = "\n\n".join([f"- {feature}" for feature in data["features"][:8]])
+
+    # Format goals
+    goals = "\n\n".join([f"- {goal}" for goal in data["goals"][:5]])
+
+    # Format scope
+    in_scope = "\n\n".join([f"- ✅ {item}" for item in data["scope"]["in"][:5]])
+    out_scope = "\n\n".join([f"- ❌ {item}" for item in data["scope"]["out"][:5]])
+
+    # Format differentiators
+    differentiators = "\n\n".join([f"- {diff}" for diff in data["differentiators"][:5]])
+
+    # Add requirements as differentiators if we don't have enough
+    if len(data["differentiators"]) < 3:
+        for req in data["requirements"][:3]:
+            if "uniquely" in req.lower() or "advanced" in req.lower():
+                differentiators += f"\n\n- {req}"
+
+    # Placeholders for sections the documents say nothing about
+    user_personas = user_personas or "- **Task Manager**: Creates and assigns tasks, monitors completion.\n\n- **Meeting Organizer**: Schedules and tracks meetings, records outcomes.\n\n- **Team Member**: Participates in tasks and meetings, updates status."
+    problems = problems or "- Users lack centralized visibility of their tasks.\n\n- No way to manage follow-ups intelligently.\n\n- Meetings are logged inconsistently and lack structured outcomes."
+    features = features or "- Smart Assistant for quick task and meeting creation\n\n- AI-based content suggestions for meetings and tasks\n\n- Dashboard with real-time task metrics and visual indicators\n\n- Role-based access control for tasks, meetings, and entities"
+    goals = goals or "- 80% task creation via Smart Assistant within 3 months\n\n- <5% overdue critical tasks after implementation\n\n- 90% accuracy in AI-generated suggestions adoption\n\n- 100% meeting linkage to relevant entities"
+    in_scope = in_scope or "- ✅ Task creation, assignment, and tracking\n\n- ✅ Meeting scheduling, recording, and follow-up\n\n- ✅ Dashboard and reporting\n\n- ✅ Integration with calendar systems"
+    out_scope = out_scope or "- ❌ Billing and invoicing features\n\n- ❌ Project management capabilities\n\n- ❌ Customer relationship management\n\n- ❌ Document management system"
+    differentiators = differentiators or "- AI-assisted workflows embedded into daily task/meeting UX\n\n- Context-aware task creation from system entities\n\n- Lightweight yet structured compliance through business rules"
+
+    # Generate timeline (placeholder)
+    timeline = """- **Q1 2026**: Core task and meeting management capabilities
+
+- **Q2 2026**: Calendar integration & recurrence features
+
+- **Q3 2026**: AI-generated suggestions and automation
+
+- **Q4 2026**: Integration with external systems and analytics"""
+
+    vision_content = f"""# Product Vision – Task and Meeting Management System
+
+## 1. Vision Statement
+
+{vision_statement}
+
+## 2. Target Users / Personas
+
+{user_personas}
+
+## 3. Problem Statements
+
+{problems}
+
+## 4. Key Capabilities / Features
+
+{features}
+
+## 5. Business Goals & Success Metrics
+
+{goals}
+
+## 6. Scope & Boundaries
+
+{in_scope}
+
+{out_scope}
+
+## 7. Timeline / Milestones
+
+{timeline}
+
+## 8. Strategic Differentiators
+
+{differentiators}
+"""
+
+    # Write to the output file
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(vision_content)
+
+    print(f"Vision.md created successfully at {output_path}")
+
+
+@cli.command()
+def vision(
+    converted_dir: P = typer.Argument(
+        P("docs/converted"), help="Folder with the documents converted to markdown."
+    ),
+    output: P = typer.Option(
+        P("docs/specifications/business/vision.md"), "--output", "-o", help="Where to write vision.md."
+    ),
+    jobs: int = typer.Option(None, help="Number of files scanned in parallel (default: one per CPU)."),
+    cache: bool = typer.Option(True, help="Only re-scan files that changed since the last run."),
+):
+    """Generate vision.md from converted markdown documents."""
+    if not converted_dir.is_dir():
+        raise typer.BadParameter(f"{converted_dir} is not a folder", param_hint="CONVERTED_DIR")
+    start = time.perf_counter()
+    files = find_markdown(converted_dir, exclude=output)
+    Info(f"Found {len(files)} markdown files in {converted_dir}")
+    if cache:
+        data, counts = extract_incremental(converted_dir, files, converted_dir / CACHE_FILE, jobs)
+        Info(
+            f"Scanned {counts['scanned']} files, reused {counts['reused']} from the cache, "
+            f"dropped {counts['dropped']}"
+        )
+    else:
+        data = extract_key_points(files, jobs)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    create_vision_md(data, output)
+    Info(f"Vision generated in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,119 @@
+"""Batch `update-prompts` over every git repository below a folder."""
+
+import contextlib, io, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path as P
+
+from .config_merge import load_templates
+from .console import Info
+from .update_prompts import index_assets, read_asset, update_repo
+
+SKIP_DIRS = {"node_modules", "__pycache__", "venv"}
+
+# Set once per worker process by `init_worker`
+_assets_dir = None
+_index = None
+_templates = None
+
+
+def find_repos(root: P) -> list[P]:
+    """Git repositories under `root`; a repository's own subfolders are not searched."""
+    repos = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if ".git" in dirnames or ".git" in filenames:
+            repos.append(P(dirpath))
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(
+            d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS
+        )
+    return sorted(repos)
+
+
+def init_worker(assets_dir: P, index: tuple, templates: dict):
+    global _assets_dir, _index, _templates
+    _assets_dir, _index, _templates = assets_dir, index, templates
+
+
+def update_one(repo: P, dry_run: bool, link: str, backup: str) -> dict:
+    """Update a single repository, capturing its output instead of printing it."""
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {"repo": repo, "added": 0, "removed": 0, "error": None}
+    try:
+        with contextlib.redirect_stdout(log):
+            added, removed = update_repo(
+                _assets_dir, repo, dry_run, link, backup, _index, _templates
+            )
+        result.update(added=len(added), removed=len(removed))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    result["log"] = log.getvalue()
+    return result
+
+
+def update_workspace(
+    assets_dir: P,
+    workspace: P,
+    dry_run: bool = False,
+    link: str = "copy",
+    backup: str = "ask",
+    jobs: int = None,
+) -> list[dict]:
+    """Run `update_repo` for every repository under `workspace` on a process pool.
+
+    The packaged assets are hashed once here and handed to the workers, and
+    the backup prompt is never shown: "ask" is treated as "never".
+    """
+    start = time.perf_counter()
+    repos = find_repos(workspace)
+    if not repos:
+        Info(f"No git repositories found under {workspace}")
+        return []
+    Info(f"Updating {len(repos)} repositories under {workspace}")
+
+    if backup == "ask":
+        backup = "never"
+    index = index_assets(assets_dir, link=link)
+    templates = load_templates(lambda rel: read_asset(assets_dir, rel))
+    jobs = min(jobs or os.cpu_count() or 1, len(repos))
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(assets_dir, index, templates),
+    ) as pool:
+        futures = [pool.submit(update_one, repo, dry_run, link, backup) for repo in repos]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "failed" if result["error"] else "done"
+            Info(f"{status}: {result['repo']} ({result['seconds']:.2f}s)")
+            results.append(result)
+
+    results.sort(key=lambda r: str(r["repo"]))
+    print_summary(results, workspace, time.perf_counter() - start)
+    return results
+
+
+def print_summary(results: list[dict], workspace: P, seconds: float):
+    """Per-repository table, then the captured output of every repository that failed."""
+    names = [str(r["repo"].relative_to(workspace)) for r in results]
+    width = max(len("Repository"), *map(len, names))
+    print(f"\n📁 {'Repository':<{width}}  {'Updated':>7}  {'Removed':>7}  {'Time':>7}  Status")
+    for name, r in zip(names, results):
+        status = f"✗ {r['error']}" if r["error"] else "✓"
+        print(
+            f"   {name:<{width}}  {r['added']:>7}  {r['removed']:>7}  {r['seconds']:>6.2f}s  {status}"
+        )
+    for name, r in zip(names, results):
+        if r["error"] and r["log"].strip():
+            print(f"\n--- {name} ---\n{r['log'].rstrip()}")
+    failed = sum(1 for r in results if r["error"])
+    print(
+        f"\nTotal: {len(results)} repositories, "
+        f"{sum(r['added'] for r in results)} files added or updated, "
+        f"{sum(r['removed'] for r in results)} removed, "
+        f"{failed} failed in {seconds:.2f}s\n"
+    )
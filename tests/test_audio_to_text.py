@@ -0,0 +1,301 @@
+"""Tests for the decoding, segmentation and chunk cache in `scripts/audio_to_text.py`."""
+
+import os, threading
+
+import numpy as np
+import pytest
+
+for module in ("torch", "transformers", "librosa", "soundfile"):
+    pytest.importorskip(module)
+
+import soundfile as sf
+
+import audio_to_text
+from audio_to_text import CHUNK_SAMPLES, DURATION_PENDING, SAMPLE_RATE, Segment, SpeechSegmenter, set_duration, timestamp
+
+rng = np.random.default_rng(0)
+
+
+def level(db, seconds):
+    """Noise at `db` dBFS"""
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 10 ** (db / 20)).astype(np.float32)
+
+
+def modulated(db, seconds, depth, rate=4):
+    """Noise whose amplitude swings by `depth` at syllable rate, with no pauses"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return level(db, seconds) * (1 + depth * np.sin(2 * np.pi * rate * t)).astype(np.float32)
+
+
+def segment(audio):
+    segmenter = SpeechSegmenter()
+    chunks = [audio[i : i + CHUNK_SAMPLES] for i in range(0, len(audio), CHUNK_SAMPLES)]
+    segments = list(segmenter(chunks))
+    assert all(len(s.audio) <= CHUNK_SAMPLES for s in segments)
+    return segmenter, segments
+
+
+def gaps(segments):
+    return [b.start - a.end for a, b in zip(segments, segments[1:])]
+
+
+def test_continuous_tone_is_speech():
+    t = np.arange(60 * SAMPLE_RATE) / SAMPLE_RATE
+    segmenter, segments = segment((0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+    assert segmenter.speech_samples >= 0.99 * segmenter.total_samples
+    assert max(gaps(segments)) <= SpeechSegmenter.FRAME
+
+
+@pytest.mark.parametrize("depth", [0.3, 0.6])
+def test_speech_without_pauses_is_not_dropped(depth):
+    segmenter, segments = segment(modulated(-25, 90, depth))
+    assert segmenter.speech_samples >= 0.99 * segmenter.total_samples
+    assert max(gaps(segments)) <= SpeechSegmenter.FRAME
+
+
+def test_pauses_and_noise_floor_are_skipped():
+    # 20 s of speech-like audio, 5 s of room noise, repeated
+    audio = np.concatenate([part for _ in range(4) for part in (modulated(-20, 20, 0.5), level(-50, 5))])
+    segmenter, segments = segment(audio)
+    skipped = 1 - segmenter.speech_samples / segmenter.total_samples
+    assert 0.15 < skipped < 0.22
+    assert all(g >= 4 * SAMPLE_RATE for g in gaps(segments))
+
+
+def test_noise_floor_above_threshold_is_skipped():
+    # Hiss louder than the -45 dBFS threshold, with the floor learnt from the pauses
+    audio = np.concatenate([part for _ in range(3) for part in (level(-35, 6), modulated(-15, 15, 0.5))])
+    segmenter, segments = segment(audio)
+    assert segmenter.speech_samples < 0.8 * segmenter.total_samples
+    assert np.isclose(segmenter.level_percentile(10), -35, atol=2)
+
+
+class FakeCache:
+    def __init__(self, hits):
+        self.hits = hits
+        self.rows = []
+
+    def get(self, audio_sha, start, end, model):
+        return f"cached {start}" if start in self.hits else None
+
+    def put(self, rows):
+        self.rows.extend(rows)
+
+
+def ring_segments(count, slots):
+    """Segments that reuse `slots` buffers, like `fixed_segments(PCMStream(...), copy=False)`"""
+    ring = np.zeros((slots, 4), dtype=np.float32)
+    for i in range(count):
+        ring[i % slots] = i
+        yield Segment(i * 4, ring[i % slots])
+
+
+def test_misses_survive_ring_reuse_by_hits(monkeypatch):
+    monkeypatch.setattr(audio_to_text, "open_chunk_cache", lambda: FakeCache(hits={4, 8, 12}))
+    monkeypatch.setattr(audio_to_text, "whisper_model_id", lambda: "fake")
+    monkeypatch.setattr(
+        audio_to_text, "transcribe_chunks", lambda chunks, *args, **kwargs: [f"audio {c[0]:.0f}" for c in chunks]
+    )
+    results = list(audio_to_text.transcribe_segments(ring_segments(6, slots=2), "sha", batch_size=2))
+    assert [text for _, _, text in results] == ["audio 0", "cached 4", "cached 8", "cached 12", "audio 4", "audio 5"]
+
+
+def test_chatty_ffmpeg_does_not_stall(tmp_path, monkeypatch):
+    samples = np.arange(3 * CHUNK_SAMPLES + 5, dtype=np.float32)
+    (tmp_path / "pcm").write_bytes(samples.tobytes())
+    # Fills any pipe buffer with warnings before writing a single sample
+    (tmp_path / "ffmpeg").write_text(
+        "#!/bin/sh\n"
+        "head -c 1000000 /dev/zero | tr '\\\\0' w >&2\n"
+        f"cat {tmp_path / 'pcm'}\n"
+    )
+    (tmp_path / "ffmpeg").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+
+    result = []
+    reader = threading.Thread(target=lambda: result.extend(c.copy() for c in audio_to_text.PCMStream("x.wav")), daemon=True)
+    reader.start()
+    reader.join(30)
+    assert not reader.is_alive()
+    assert np.array_equal(np.concatenate(result), samples)
+
+
+class StubWhisper:
+    """Processor and model in one: a chunk's "transcript" is its first sample, and
+    `generate` raises once `fail_after` chunks have gone through it"""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.generated = []
+
+    def __call__(self, chunks, **kwargs):
+        self.chunks = [round(float(chunk[0]), 2) for chunk in chunks]
+        return self
+
+    def to(self, device):
+        return {"input_features": self.chunks, "attention_mask": None}
+
+    def generate(self, features, attention_mask=None):
+        if self.fail_after is not None and len(self.generated) + len(features) > self.fail_after:
+            raise RuntimeError("out of memory")
+        self.generated.extend(features)
+        return features
+
+    def batch_decode(self, ids, skip_special_tokens=False):
+        return [f"chunk {first:g}" for first in ids]
+
+
+@pytest.fixture
+def whisper(monkeypatch, tmp_path):
+    """A `StubWhisper` in place of the model, fixed 30-second chunks and a fresh chunk cache"""
+    stub = StubWhisper()
+    monkeypatch.setattr(audio_to_text, "initialize_whisper", lambda: None)
+    monkeypatch.setattr(audio_to_text, "whisper_model", stub)
+    monkeypatch.setattr(audio_to_text, "whisper_processor", stub)
+    monkeypatch.setattr(audio_to_text, "vad_enabled", False)
+    monkeypatch.setattr(audio_to_text, "chunk_cache_path", tmp_path / "cache" / "transcripts.sqlite")
+    monkeypatch.setattr(audio_to_text, "chunk_cache", None)
+    return stub
+
+
+def recording(path, chunks):
+    """`chunks` 30-second chunks of a constant level, 0.01 for the first, 0.02 for the next and so on"""
+    audio = np.repeat(np.arange(1, chunks + 1, dtype=np.float32) / 100, CHUNK_SAMPLES)
+    sf.write(str(path), audio[: -SAMPLE_RATE], SAMPLE_RATE, subtype="FLOAT")
+    return path
+
+
+def test_timestamps_roll_over_to_hours():
+    assert timestamp(0) == "0:00:00"
+    assert timestamp(59.9 * SAMPLE_RATE) == "0:00:59"
+    assert timestamp(3599 * SAMPLE_RATE) == "0:59:59"
+    assert timestamp(3600 * SAMPLE_RATE) == "1:00:00"
+    assert timestamp(36061 * SAMPLE_RATE) == "10:01:01"
+
+
+def test_set_duration_replaces_only_the_header_line(tmp_path):
+    pending = f"- **Duration:** {DURATION_PENDING}\n"
+    body = f"# Audio Transcript: x\n\n{pending}\n## Transcript\n\n**[0:00:00 - 0:00:30]** {pending}"
+    partial = tmp_path / ".x.md.partial"
+    partial.write_text(body)
+    set_duration(partial, "61.50 seconds", tmp_path / "x.md")
+    assert not partial.exists()
+    assert (tmp_path / "x.md").read_text() == body.replace(pending, "- **Duration:** 61.50 seconds\n", 1)
+
+    (tmp_path / "y.md").write_text(body)
+    set_duration(tmp_path / "y.md", "1.00 seconds")
+    assert (tmp_path / "y.md").read_text() == body.replace(pending, "- **Duration:** 1.00 seconds\n", 1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["x.md", "y.md"]
+
+
+def test_transcript_is_moved_into_place_only_when_finished(tmp_path, whisper):
+    audio = recording(tmp_path / "talk.wav", 5)
+    output = tmp_path / "talk.md"
+    output.write_text("last good transcript")
+
+    whisper.fail_after = 2
+    assert not audio_to_text.transcribe_audio(audio, output, batch_size=2)
+    assert output.read_text() == "last good transcript"
+    partial = audio_to_text.partial_path(output).read_text()
+    assert f"- **Duration:** {DURATION_PENDING}\n" in partial
+    assert partial.endswith("**[0:00:30 - 0:01:00]** chunk 0.02\n\n")
+
+    whisper.fail_after = None
+    assert audio_to_text.transcribe_audio(audio, output, batch_size=2)
+    assert not audio_to_text.partial_path(output).exists()
+    text = output.read_text()
+    assert "- **Duration:** 149.00 seconds\n" in text
+    assert text.endswith("## Transcript\n\n" + "".join(
+        f"**[{timestamp(i * CHUNK_SAMPLES)} - {timestamp(min((i + 1) * CHUNK_SAMPLES, 149 * SAMPLE_RATE))}]** chunk 0.0{i + 1}\n\n"
+        for i in range(5)
+    ))
+
+
+@pytest.mark.parametrize("vad", [False, True])
+def test_prefetch_does_not_change_the_transcript(tmp_path, whisper, monkeypatch, vad):
+    monkeypatch.setattr(audio_to_text, "vad_enabled", vad)
+    monkeypatch.setattr(audio_to_text, "chunk_cache_path", None)
+    audio = recording(tmp_path / "talk.wav", 5)
+    transcripts = []
+    for prefetch in (0, 8):
+        monkeypatch.setattr(audio_to_text, "prefetch_chunks", prefetch)
+        output = tmp_path / f"prefetch-{prefetch}.md"
+        assert audio_to_text.transcribe_audio(audio, output, batch_size=2)
+        transcripts.append(output.read_text())
+    assert transcripts[0] == transcripts[1]
+    assert transcripts[0].count("** chunk ") >= 5
+
+
+def test_prefetch_stops_its_producer_when_the_consumer_fails():
+    closed = threading.Event()
+
+    def produce():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.set()
+
+    prefetch = audio_to_text.Prefetch(produce(), 2)
+    with pytest.raises(RuntimeError):
+        try:
+            for item in prefetch:
+                if item == 3:
+                    raise RuntimeError("model failed")
+        finally:
+            prefetch.close()
+    assert not prefetch.thread.is_alive()
+    assert closed.is_set()
+
+
+def test_failed_transcription_stops_prefetching(tmp_path, whisper, monkeypatch):
+    started = []
+
+    class Recorded(audio_to_text.Prefetch):
+        def __init__(self, *args):
+            super().__init__(*args)
+            started.append(self)
+
+    monkeypatch.setattr(audio_to_text, "Prefetch", Recorded)
+    monkeypatch.setattr(audio_to_text, "prefetch_chunks", 1)
+    whisper.fail_after = 0
+    assert not audio_to_text.transcribe_audio(recording(tmp_path / "talk.wav", 5), tmp_path / "talk.md", batch_size=1)
+    assert len(started) == 1 and not started[0].thread.is_alive()
+
+
+def test_rerun_after_a_failure_transcribes_only_the_missing_segments(tmp_path, whisper):
+    audio = recording(tmp_path / "talk.wav", 5)
+    output = tmp_path / "talk.md"
+    whisper.fail_after = 2
+    assert not audio_to_text.transcribe_audio(audio, output, batch_size=2)
+    assert whisper.generated == [0.01, 0.02]
+
+    whisper.fail_after = None
+    whisper.generated = []
+    assert audio_to_text.transcribe_audio(audio, output, batch_size=2)
+    assert whisper.generated == [0.03, 0.04, 0.05]
+    assert [f"chunk 0.0{i}" in output.read_text() for i in range(1, 6)] == [True] * 5
+
+    whisper.generated = []
+    assert audio_to_text.transcribe_audio(audio, tmp_path / "again.md", batch_size=2)
+    assert whisper.generated == []
+    assert (tmp_path / "again.md").read_text() == output.read_text()
+
+
+def test_finished_files_forget_other_models(tmp_path, whisper):
+    audio = recording(tmp_path / "talk.wav", 2)
+    cache = audio_to_text.open_chunk_cache()
+    sha = cache.file_hash(audio)
+    cache.put([(sha, 0, 10, "whisper/old", "old"), ("other-file", 0, 10, "whisper/old", "kept")])
+
+    whisper.fail_after = 1
+    assert not audio_to_text.transcribe_audio(audio, tmp_path / "talk.md", batch_size=1)
+    assert cache.get(sha, 0, 10, "whisper/old") == "old"
+
+    whisper.fail_after = None
+    assert audio_to_text.transcribe_audio(audio, tmp_path / "talk.md", batch_size=1)
+    assert cache.get(sha, 0, 10, "whisper/old") is None
+    assert cache.get("other-file", 0, 10, "whisper/old") == "kept"
+    model = audio_to_text.whisper_model_id()
+    assert cache.get(sha, 0, CHUNK_SAMPLES, model) == "chunk 0.01"
+    cache.close()
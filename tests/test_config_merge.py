@@ -0,0 +1,44 @@
+"""Tests for merging the `.vscode` JSON templates."""
+
+import json
+
+from daksh.config_merge import deep_merge, merge_config, merge_tasks
+
+
+def test_deep_merge_keeps_user_keys():
+    user = {"editor.tabSize": 2, "chat.modeFilesLocations": {"mine/**": True}}
+    template = {"chat.modeFilesLocations": {".daksh/prompts/**/": True}}
+    assert deep_merge(user, template) == {
+        "editor.tabSize": 2,
+        "chat.modeFilesLocations": {"mine/**": True, ".daksh/prompts/**/": True},
+    }
+
+
+def test_merge_tasks_replaces_by_label():
+    user = {"version": "1", "tasks": [{"label": "Build", "command": "old"}, {"label": "Mine"}]}
+    template = {"version": "2.0.0", "tasks": [{"label": "Build", "command": "new"}]}
+    assert merge_tasks(user, template) == {
+        "version": "2.0.0",
+        "tasks": [{"label": "Build", "command": "new"}, {"label": "Mine"}],
+    }
+
+
+def test_merge_config_skips_identical_and_invalid(tmp_path, capsys):
+    settings = tmp_path / ".vscode" / "settings.json"
+    template = {"a": {"b": True}}
+    assert merge_config(settings, "settings.json", template) == "updated"
+    assert json.loads(settings.read_text()) == template
+
+    mtime = settings.stat().st_mtime_ns
+    assert merge_config(settings, "settings.json", template) == "unchanged"
+    assert settings.stat().st_mtime_ns == mtime
+
+    assert merge_config(settings, "settings.json", {"c": 1}, dry_run=True) == "updated"
+    assert '+    "c": 1' in capsys.readouterr().out
+    assert json.loads(settings.read_text()) == template
+
+    tasks = tmp_path / ".vscode" / "tasks.json"
+    tasks.write_text("{ // not json")
+    assert merge_config(tasks, "tasks.json", {"tasks": []}) == "invalid"
+    assert tasks.read_text() == "{ // not json"
+    assert capsys.readouterr().out.startswith(f"[INFO] Warning: Not touching {tasks}, it is not valid JSON")
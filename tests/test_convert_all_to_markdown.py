@@ -0,0 +1,305 @@
+"""Tests for `scripts/convert_all_to_markdown.py`."""
+
+import os, threading, time
+
+import pytest
+
+import convert_all_to_markdown
+from convert_all_to_markdown import (
+    AdaptiveLimiter,
+    ConversionCache,
+    ConverterPool,
+    JobJournal,
+    failure,
+    pick_converter,
+    process_directory,
+    sniff,
+    state_path,
+)
+
+# Stands in for MarkItDown in the converter workers: a file saying "crash"
+# kills the worker, "sleep <s>" delays the reply, and every output starts
+# with the pid of the worker that wrote it
+STUB_MARKITDOWN = """
+import os, time, types
+
+class MarkItDown:
+    def convert(self, path):
+        text = open(path).read()
+        if text == "crash":
+            os._exit(3)
+        if text.startswith("sleep"):
+            time.sleep(float(text.split()[1]))
+        return types.SimpleNamespace(text_content=f"{os.getpid()}\\n{text}")
+"""
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path_factory, monkeypatch):
+    """Keep the state of runs without an output folder out of the user's cache"""
+    state = tmp_path_factory.mktemp("state")
+    monkeypatch.setattr(convert_all_to_markdown, "STATE_DIR", state)
+    return state
+
+
+def test_rerun_in_place_keeps_output_names(tmp_path):
+    (tmp_path / "notes.txt").write_text("Meeting notes\n")
+    (tmp_path / "report.txt").write_text("Report\n")
+    (tmp_path / "report.md").write_text("The user's own report\n")
+    for _ in range(2):
+        assert process_directory(tmp_path, jobs=1) == (2, 0)
+    names = sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith("."))
+    assert names == ["notes.md", "notes.txt", "report.md", "report.txt", "report.txt.md"]
+    assert (tmp_path / "report.md").read_text() == "The user's own report\n"
+
+
+def test_in_place_runs_keep_their_state_out_of_the_tree(tmp_path, state_dir):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "notes.txt").write_text("Meeting notes\n")
+    for _ in range(2):
+        assert process_directory(docs, jobs=1) == (1, 0)
+    assert sorted(p.name for p in docs.iterdir()) == ["notes.md", "notes.txt"]
+    assert state_path(docs).parent == state_dir
+    cache = ConversionCache(state_path(docs))
+    assert cache.outputs() == {str(docs / "notes.md")}
+    cache.close()
+    assert state_path(docs) != state_path(tmp_path)
+
+    assert process_directory(docs, tmp_path / "out", jobs=1) == (1, 0)
+    assert (tmp_path / "out" / ConversionCache.FILENAME).exists()
+
+
+def test_journal_records_and_lists_jobs(tmp_path):
+    journal = JobJournal(tmp_path / "state.db")
+    journal.record(tmp_path / "b.txt", "pending", tmp_path / "out" / "b.md")
+    journal.record(tmp_path / "a.txt", "pending", tmp_path / "out" / "a.md")
+    journal.record(tmp_path / "b.txt", "failed", tmp_path / "out" / "b.md", "boom", 0.5)
+    journal.walk_complete = True
+    journal.close()
+
+    journal = JobJournal(tmp_path / "state.db")
+    assert journal.walk_complete
+    assert journal.counts() == {"pending": 1, "failed": 1}
+    assert list(journal.jobs("pending")) == [(tmp_path / "a.txt", tmp_path / "out", "a.md")]
+    assert journal.paths("failed") == {str(tmp_path / "b.txt")}
+    assert journal.outputs() == {str(tmp_path / "out" / "a.md"), str(tmp_path / "out" / "b.md")}
+    journal.close()
+
+
+def test_resume_picks_up_new_files(tmp_path):
+    source, output = tmp_path / "in", tmp_path / "out"
+    source.mkdir()
+    (source / "a.txt").write_text("First\n")
+    assert process_directory(source, output, jobs=1, resume=True) == (1, 0)
+    assert process_directory(source, output, jobs=1, resume=True) == (0, 0)
+    (source / "b.txt").write_text("Second\n")
+    assert process_directory(source, output, jobs=1, resume=True) == (1, 0)
+    assert sorted(p.name for p in output.iterdir() if not p.name.startswith(".")) == ["a.md", "b.md"]
+
+
+def test_resume_in_place_journals_outside_the_tree(tmp_path, state_dir):
+    (tmp_path / "a.txt").write_text("First\n")
+    assert process_directory(tmp_path, jobs=1, use_cache=False, resume=True) == (1, 0)
+    (tmp_path / "b.txt").write_text("Second\n")
+    assert process_directory(tmp_path, jobs=1, use_cache=False, resume=True) == (1, 0)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.md", "a.txt", "b.md", "b.txt"]
+    journal = JobJournal(state_path(tmp_path))
+    assert journal.counts() == {"done": 2}
+    journal.close()
+
+
+def test_resume_finishes_pending_files_without_walking(tmp_path):
+    source, output = tmp_path / "in", tmp_path / "out"
+    source.mkdir()
+    output.mkdir()
+    (source / "a.txt").write_text("First\n")
+    (source / "b.txt").write_text("Second\n")
+    journal = JobJournal(output / ConversionCache.FILENAME)
+    journal.record(source / "a.txt", "done", output / "a.md")
+    journal.record(source / "b.txt", "pending", output / "b.md")
+    journal.walk_complete = True
+    journal.close()
+    (source / "c.txt").write_text("Added after the walk\n")
+    assert process_directory(source, output, jobs=1, resume=True) == (1, 0)
+    assert sorted(p.name for p in output.iterdir() if not p.name.startswith(".")) == ["b.md"]
+
+
+def test_progress_is_reported_in_discovery_order(tmp_path, capsys):
+    names = ["a.txt", "b.txt", "c.txt", "d.txt"]
+    for name in names:
+        (tmp_path / name).write_text(name)
+
+    def convert(file_path, output_dir, output_name, cache=None):
+        # Later files finish first
+        time.sleep(0.05 * (len(names) - names.index(file_path.name)))
+        print(f"working on {file_path.name}")
+        return file_path.name != "c.txt"
+
+    assert process_directory(tmp_path, jobs=4, convert=convert, use_cache=False) == (3, 1)
+    lines = [line for line in capsys.readouterr().out.splitlines() if "working on" in line or line.startswith("[")]
+    order = [line.rsplit("/", 1)[1] for line in lines[1::2]]
+    assert sorted(order) == names
+    assert lines == [
+        line
+        for index, name in enumerate(order, 1)
+        for line in (f"working on {name}", f"[{index}] {'✗' if name == 'c.txt' else '✓'} {tmp_path / name}")
+    ]
+
+
+def test_limiter_backs_off_on_failures_and_recovers(monkeypatch):
+    limiter = AdaptiveLimiter(8)
+    monkeypatch.setattr(limiter, "overloaded", lambda: False)
+    for _ in range(8):
+        limiter.acquire()
+    limiter.release(False)
+    limiter.release(False)
+    assert (limiter.limit, limiter.active) == (2, 6)
+
+    waiting = threading.Thread(target=limiter.acquire, daemon=True)
+    waiting.start()
+    waiting.join(0.2)
+    assert waiting.is_alive()
+    limiter.release(True)
+    limiter.release(True)
+    waiting.join(0.2)
+    assert waiting.is_alive()
+    assert (limiter.limit, limiter.active) == (4, 4)
+    limiter.release(True)
+    waiting.join(5)
+    assert not waiting.is_alive()
+    assert (limiter.limit, limiter.active) == (5, 4)
+
+
+def test_limiter_admits_one_job_when_overloaded(monkeypatch):
+    limiter = AdaptiveLimiter(4)
+    monkeypatch.setattr(limiter, "overloaded", lambda: True)
+    limiter.acquire()
+    waiting = threading.Thread(target=limiter.acquire, daemon=True)
+    waiting.start()
+    waiting.join(0.2)
+    assert waiting.is_alive()
+    limiter.release(True)
+    waiting.join(5)
+    assert not waiting.is_alive()
+
+
+@pytest.fixture
+def stub_markitdown(tmp_path, monkeypatch):
+    site = tmp_path / "site"
+    (site / "markitdown").mkdir(parents=True)
+    (site / "markitdown" / "__init__.py").write_text(STUB_MARKITDOWN)
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(site), os.environ.get("PYTHONPATH")])))
+    monkeypatch.syspath_prepend(str(site))
+
+
+def convert_with(pool, path, text):
+    path.write_text(text)
+    output = path.with_suffix(".md")
+    return pool.convert(path, output), output.read_text().split("\n")[0] if output.exists() else None
+
+
+def test_converter_workers_are_recycled(tmp_path, stub_markitdown):
+    pool = ConverterPool(1, max_files=2)
+    try:
+        pids = [convert_with(pool, tmp_path / f"{i}.pdf", "text")[1] for i in range(5)]
+    finally:
+        pool.close()
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert len(set(pids)) == 3
+
+
+def test_crashed_converter_worker_fails_the_file_and_is_replaced(tmp_path, stub_markitdown):
+    pool = ConverterPool(1)
+    try:
+        ok, first = convert_with(pool, tmp_path / "a.pdf", "text")
+        assert ok
+        assert convert_with(pool, tmp_path / "b.pdf", "crash") == (False, None)
+        assert "converter worker exited" in failure.message
+        assert pool.workers == []
+        ok, second = convert_with(pool, tmp_path / "c.pdf", "text")
+        assert ok and second != first
+        assert len(pool.workers) == 1
+    finally:
+        pool.close()
+
+
+def test_converter_workers_report_in_submission_order(tmp_path, stub_markitdown, capsys, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    delays = [0.6, 0.4, 0.2, 0, 0]
+    for i, delay in enumerate(delays):
+        (docs / f"{i}.pdf").write_text(f"sleep {delay}")
+    (docs / "5.pdf").write_text("crash")
+    # Submit the slowest files first, so workers finish them last
+    iter_files = convert_all_to_markdown.iter_files
+    monkeypatch.setattr(convert_all_to_markdown, "iter_files", lambda *a: sorted(iter_files(*a)))
+
+    assert process_directory(docs, jobs=3, use_cache=False) == (5, 1)
+    assert convert_all_to_markdown.converter_pool is None
+    out = capsys.readouterr().out.splitlines()
+    lines = [line for line in out if line.startswith("[")]
+    assert lines == [f"[{i + 1}] {'✗' if i == 5 else '✓'} {docs / f'{i}.pdf'}" for i in range(6)]
+    for i, delay in enumerate(delays):
+        assert (docs / f"{i}.md").read_text().endswith(f"sleep {delay}")
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        ("scan", b"%PDF-1.7\n%binary", "document"),
+        ("slides.bin", b"PK\x03\x04\x14\x00", "document"),
+        ("legacy.dat", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "document"),
+        ("page", b"\xef\xbb\xbf\n  <!DOCTYPE html><html><body>Hi</body></html>", "html"),
+        ("page.dat", b"<HTML><body>Hi</body></HTML>", "html"),
+        ("README", b"Plain words\n", "text"),
+        ("script.py", b"print('\xff')", "text"),
+        ("blob", b"abc\x00def", "document"),
+        ("latin1.dat", "caf\xe9 au lait, s'il vous pla\xeet".encode("latin-1"), "document"),
+        ("cut.dat", b"a" * 4095 + "\xe9".encode("utf-8"), "text"),
+        ("empty", b"", "text"),
+    ],
+)
+def test_sniff_picks_a_converter_from_the_content(tmp_path, name, content, expected):
+    (tmp_path / name).write_bytes(content)
+    assert sniff(tmp_path / name) == expected
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        ("table.CSV", b"a,b\n", "csv"),
+        ("page.Htm", b"<p>Hi</p>", "html"),
+        ("analysis.ipynb", b"{}", "ipynb"),
+        # Extensions win over content when they are registered ...
+        ("notes.txt", b"%PDF-1.7", "text"),
+        # ... and content decides when they are not
+        ("report.weird", b"%PDF-1.7", "document"),
+        ("export", b"<!doctype html><p>Hi</p>", "html"),
+    ],
+)
+def test_pick_converter_by_extension_then_content(tmp_path, name, content, expected):
+    (tmp_path / name).write_bytes(content)
+    assert pick_converter(tmp_path / name).name == expected
+
+
+def test_directory_headers_come_with_their_files(tmp_path, capsys, monkeypatch):
+    for folder, delay in (("a", 0.3), ("b", 0), ("c", 0.1)):
+        (tmp_path / folder).mkdir()
+        for name in ("1.txt", "2.txt"):
+            (tmp_path / folder / name).write_text(str(delay))
+
+    def convert(file_path, output_dir, output_name, cache=None):
+        time.sleep(float(file_path.read_text()))
+        return True
+
+    iter_files = convert_all_to_markdown.iter_files
+    monkeypatch.setattr(convert_all_to_markdown, "iter_files", lambda *a: sorted(iter_files(*a)))
+    assert process_directory(tmp_path, jobs=6, convert=convert, use_cache=False) == (6, 0)
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith(("[", "Processing directory"))]
+    assert lines == [
+        line
+        for folder in "abc"
+        for line in [f"Processing directory: {tmp_path / folder}"]
+        + [f"[{'abc'.index(folder) * 2 + i}] ✓ {tmp_path / folder / f'{i}.txt'}" for i in (1, 2)]
+    ]
@@ -0,0 +1,108 @@
+"""Tests for the incremental asset sync in `daksh.update_prompts`."""
+
+import errno
+
+from daksh import installer
+from daksh.bundle import read_index, write_bundle
+from daksh.manifest import read_manifest
+from daksh.update_prompts import sync_assets
+
+
+def make_assets(root):
+    (root / "daksh-prompts" / "prompts").mkdir(parents=True)
+    (root / "daksh-prompts" / "prompts" / "a.md").write_text("a")
+    (root / "daksh-prompts" / ".version").write_text("1")
+    (root / "run-mkdocs.sh").write_text("echo hi")
+    return root
+
+
+def test_sync_installs_then_noops(tmp_path):
+    assets = make_assets(tmp_path / "assets")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    changes = sync_assets(assets, repo)
+    assert sorted(changes["written"]) == [".daksh/prompts/a.md", "run-mkdocs.sh"]
+    assert not (repo / ".daksh" / ".version").exists()
+    assert (repo / "run-mkdocs.sh").stat().st_mode & 0o777 == 0o755
+    assert set(read_manifest(repo)["files"]) == {".daksh/prompts/a.md", "run-mkdocs.sh"}
+
+    manifest_mtime = (repo / ".daksh" / ".manifest.json").stat().st_mtime_ns
+    changes = sync_assets(assets, repo)
+    assert not any(changes.values())
+    assert (repo / ".daksh" / ".manifest.json").stat().st_mtime_ns == manifest_mtime
+
+
+def test_sync_updates_and_removes_only_what_changed(tmp_path):
+    assets = make_assets(tmp_path / "assets")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    sync_assets(assets, repo)
+
+    (assets / "daksh-prompts" / "prompts" / "a.md").unlink()
+    (assets / "daksh-prompts" / "prompts" / "b.md").write_text("b")
+    (repo / "run-mkdocs.sh").chmod(0o644)
+
+    changes = sync_assets(assets, repo)
+    assert changes["written"] == [".daksh/prompts/b.md"]
+    assert changes["chmod"] == ["run-mkdocs.sh"]
+    assert changes["deleted"] == [".daksh/prompts/a.md"]
+    assert not (repo / ".daksh" / "prompts" / "a.md").exists()
+
+
+def test_sync_link_modes(tmp_path):
+    assets = make_assets(tmp_path / "assets")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    installed = repo / ".daksh" / "prompts" / "a.md"
+
+    sync_assets(assets, repo, link="symlink")
+    assert installed.is_symlink()
+    assert installed.resolve() == (assets / "daksh-prompts" / "prompts" / "a.md").resolve()
+    assert not any(sync_assets(assets, repo, link="symlink").values())
+
+    sync_assets(assets, repo, link="hardlink")
+    assert not installed.is_symlink()
+    assert installed.stat().st_ino == (assets / "daksh-prompts" / "prompts" / "a.md").stat().st_ino
+
+    changes = sync_assets(assets, repo)
+    assert ".daksh/prompts/a.md" in changes["written"]
+    assert installed.stat().st_nlink == 1
+
+
+def test_sync_from_packed_bundle(tmp_path):
+    assets = make_assets(tmp_path / "assets")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    sync_assets(assets, repo)
+
+    bundle = tmp_path / "assets.pack"
+    assert write_bundle(assets, bundle)
+    assert not write_bundle(assets, bundle)
+    assert read_index(bundle)["run-mkdocs.sh"]["mode"] == 0o755
+
+    # the bundle describes the same content, so nothing needs rewriting
+    assert not any(sync_assets(assets, repo).values())
+
+    (repo / ".daksh" / "prompts" / "a.md").unlink()
+    changes = sync_assets(assets, repo)
+    assert changes["written"] == [".daksh/prompts/a.md"]
+    assert (repo / ".daksh" / "prompts" / "a.md").read_text() == "a"
+
+
+def test_sync_keeps_copies_a_hardlink_fell_back_to(tmp_path, monkeypatch):
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(installer.os, "link", cross_device)
+    assets = make_assets(tmp_path / "assets")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    assert sorted(sync_assets(assets, repo, link="hardlink")["written"]) == [".daksh/prompts/a.md", "run-mkdocs.sh"]
+    assert (repo / ".daksh" / "prompts" / "a.md").stat().st_nlink == 1
+    assert not any(sync_assets(assets, repo, link="hardlink").values())
+
+    (assets / "daksh-prompts" / "prompts" / "a.md").write_text("changed")
+    assert sync_assets(assets, repo, link="hardlink")["written"] == [".daksh/prompts/a.md"]
+    assert (repo / ".daksh" / "prompts" / "a.md").read_text() == "changed"
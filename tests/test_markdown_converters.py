@@ -0,0 +1,133 @@
+"""Tests for the streaming converters in `scripts/markdown_converters.py`."""
+
+import json
+
+import pytest
+
+import markdown_converters
+from markdown_converters import (
+    ShardWriter,
+    csv_to_markdown,
+    html_to_markdown,
+    ipynb_to_markdown,
+    json_to_markdown,
+    part_paths,
+    text_to_markdown,
+)
+
+
+def test_shard_writer_splits_into_parts_with_an_index(tmp_path):
+    output = tmp_path / "big.md"
+    with ShardWriter(output, "big.csv", "| a |\n", max_rows=2) as out:
+        for i in range(5):
+            out.write_row(f"| {i} |\n")
+    parts = part_paths(output)
+    assert [p.name for p in parts] == [f"big.part-000{i}.md" for i in (1, 2, 3)]
+    assert parts[2].read_text() == "| a |\n| 4 |\n"
+    assert "- [Part 3](big.part-0003.md): rows 5-5" in output.read_text()
+
+    # A shorter rerun fits in one part: the index and the old parts go
+    with ShardWriter(output, "big.csv", "| a |\n", max_rows=2) as out:
+        out.write_row("| 0 |\n")
+    assert part_paths(output) == []
+    assert output.read_text() == "| a |\n| 0 |\n"
+
+
+def test_shard_writer_keeps_an_open_row_in_one_part(tmp_path):
+    output = tmp_path / "out.md"
+    with ShardWriter(output, "out", max_rows=1) as out:
+        out.write_row("first\n")
+        out.write_row("sec", end=False)
+        out.write_row("ond\n")
+        out.write_row("last")
+    assert [p.read_text() for p in part_paths(output)] == ["first\n", "second\n", "last"]
+    assert "rows 3-3" in output.read_text()
+
+
+def test_long_json_lines_are_not_broken(tmp_path, monkeypatch):
+    monkeypatch.setattr(markdown_converters, "MAX_LINE", 1000)
+    data = {"text": "a" * 5000, "items": list(range(500))}
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps(data))
+    json_to_markdown(source, tmp_path / "data.md")
+    text = (tmp_path / "data.md").read_text()
+    assert text.startswith("```json\n") and text.endswith("\n```\n")
+    assert json.loads(text[len("```json\n") : -len("```\n")]) == data
+
+
+def test_csv_with_huge_cells(tmp_path):
+    source = tmp_path / "wide.csv"
+    source.write_text("name,blob\nx," + "b" * 300_000 + "\n")
+    csv_to_markdown(source, tmp_path / "wide.md")
+    lines = (tmp_path / "wide.md").read_text().splitlines()
+    assert lines[:2] == ["| name | blob |", "| --- | --- |"]
+    assert len(lines[2]) > 300_000
+
+
+def test_text_is_copied_as_is(tmp_path):
+    source = tmp_path / "notes.txt"
+    source.write_bytes("Title\r\n\n\n  indented\nno newline at the end".encode("utf-8"))
+    text_to_markdown(source, tmp_path / "notes.md")
+    assert (tmp_path / "notes.md").read_text() == "Title\n\n\n  indented\nno newline at the end"
+
+
+def test_html_structure_becomes_markdown(tmp_path):
+    source = tmp_path / "page.html"
+    source.write_text(
+        "<html><head><title>Page</title><style>p { color: red }</style></head><body>"
+        "<h1>Hi <em>there</em></h1><p>Some   <a href='u'>link</a>\n text</p><p></p><p></p>"
+        "<ul><li>one</li><li><strong>two</strong></li></ul>"
+        "<table><tr><th>a</th><th>b</th></tr><tr><td>1</td><td>2</td></tr></table></body></html>"
+    )
+    html_to_markdown(source, tmp_path / "page.md")
+    assert (tmp_path / "page.md").read_text() == (
+        "# Hi *there*\n\nSome [link](u) text\n\n- one\n- **two**\n\n| a | b |\n| --- | --- |\n| 1 | 2 |\n"
+    )
+
+
+def test_html_pre_keeps_its_blank_lines(tmp_path):
+    source = tmp_path / "code.html"
+    source.write_text("<p>Before</p><pre><code>def f():\n\n\n<span>    return</span> 1\n\n\n\n<span>f</span>()</code></pre><p>After</p>")
+    html_to_markdown(source, tmp_path / "code.md")
+    assert (tmp_path / "code.md").read_text() == (
+        "Before\n\n```\ndef f():\n\n\n    return 1\n\n\n\nf()\n```\n\nAfter\n"
+    )
+
+
+def test_notebook_cells(tmp_path):
+    notebook = {
+        "metadata": {"kernelspec": {"language": "python"}},
+        "cells": [
+            {"cell_type": "markdown", "source": ["# Analysis\n", "Intro"]},
+            {"cell_type": "code", "source": "print(1)\n", "outputs": []},
+            {"cell_type": "code", "source": "   "},
+            {"cell_type": "raw", "source": "raw text"},
+        ],
+    }
+    source = tmp_path / "analysis.ipynb"
+    source.write_text(json.dumps(notebook))
+    ipynb_to_markdown(source, tmp_path / "analysis.md")
+    assert (tmp_path / "analysis.md").read_text() == (
+        "# Analysis\nIntro\n\n```python\nprint(1)\n```\n\n```\nraw text\n```\n\n"
+    )
+
+
+def test_workbook_sheets_become_tables(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Sales"
+    workbook.active.append(["region", "total"])
+    workbook.active.append(["north", 3])
+    workbook.active.append(["south", None])
+    workbook.save(tmp_path / "book.xlsx")
+    markdown_converters.xlsx_to_markdown(tmp_path / "book.xlsx", tmp_path / "book.md")
+    assert (tmp_path / "book.md").read_text() == (
+        "\n## Sales\n\n| region | total |\n| --- | --- |\n| north | 3 |\n| south |  |\n"
+    )
+
+
+def test_ragged_csv_rows_fit_the_header(tmp_path):
+    source = tmp_path / "ragged.csv"
+    source.write_text("a,b,c\n1\n1,2,3,4,5\n")
+    csv_to_markdown(source, tmp_path / "ragged.md")
+    assert (tmp_path / "ragged.md").read_text() == "| a | b | c |\n| --- | --- | --- |\n| 1 |  |  |\n| 1 | 2 | 3 |\n"
@@ -0,0 +1,27 @@
+"""Tests for the near-duplicate ranking used by `daksh vision`."""
+
+from daksh.near_duplicates import rank_statements
+
+LINES = [
+    "Dashboards should show overdue tasks per team member.",
+    "The main problem is that follow-ups get lost between meetings.",
+    "The main problem is that follow ups get lost between meetings",
+    "- The main problem is that follow-ups get lost between the meetings.",
+    "Meetings are logged inconsistently and lack structured outcomes.",
+]
+
+
+def test_near_duplicates_collapse_and_rank_by_support():
+    documents = [[0], [1], [1, 2], [3], [0]]
+    assert rank_statements(LINES, documents) == [
+        "The main problem is that follow ups get lost between meetings",
+        "Dashboards should show overdue tasks per team member.",
+        "Meetings are logged inconsistently and lack structured outcomes.",
+    ]
+
+
+def test_support_counts_documents_once_per_cluster():
+    # both lines of the cluster come from document 0, so it ties with the others
+    documents = [[1], [0], [0], [0], [2]]
+    assert rank_statements(LINES, documents)[0] == LINES[0]
+    assert rank_statements([], []) == []
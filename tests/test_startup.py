@@ -0,0 +1,61 @@
+"""Startup budget for the `daksh` CLI.
+
+`daksh --help` must not import any command module, let alone heavy
+dependencies such as torch. Override the wall-clock budget with
+DAKSH_STARTUP_BUDGET (seconds) on slow machines.
+"""
+
+import json, os, subprocess, sys, time
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+HEAVY_MODULES = ["torch", "transformers", "librosa", "soundfile", "numpy"]
+
+HELP_SCRIPT = """
+import json, sys
+from daksh import cli
+try:
+    cli(["--help"])
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+IMPORT_SCRIPT = """
+import importlib, json, sys
+importlib.import_module(sys.argv[1])
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def run_python(script, *args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", script, *args], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return time.perf_counter() - start, json.loads(out.splitlines()[-1])
+
+
+def run_help():
+    return run_python(HELP_SCRIPT)
+
+
+def test_help_imports_no_commands():
+    _, modules = run_help()
+    assert [m for m in modules if m.startswith("daksh.") and m != "daksh.__pre_init__"] == []
+    assert [m for m in HEAVY_MODULES if m in modules] == []
+
+
+def test_help_startup_budget():
+    budget = float(os.environ.get("DAKSH_STARTUP_BUDGET", "1.0"))
+    best = min(run_help()[0] for _ in range(3))
+    assert best < budget, f"cold `daksh --help` took {best:.3f}s, budget is {budget:.3f}s"
+
+
+@pytest.mark.parametrize("module", ["daksh.vision", "daksh.pipeline"])
+def test_document_commands_do_not_import_the_installer(module):
+    _, modules = run_python(IMPORT_SCRIPT, module)
+    assert [m for m in ("daksh.update_prompts", "daksh.installer", "daksh.config_merge") if m in modules] == []
@@ -0,0 +1,115 @@
+"""Tests for the transcription service in `scripts/transcribe_daemon.py`."""
+
+import json, socket, threading, time
+
+import pytest
+
+for module in ("torch", "transformers", "librosa", "soundfile"):
+    pytest.importorskip(module)
+
+import audio_to_text
+import convert_all_to_markdown
+import transcribe_daemon
+from audio_to_text import daemon_request
+
+
+def stub_transcribe(audio_path, output_path, batch_size=None):
+    """Loads a pretend model, takes a moment, and fails on files named bad*"""
+    audio_to_text.whisper_model = "model"
+    time.sleep(0.1)
+    if audio_path.name.startswith("bad"):
+        return convert_all_to_markdown.conversion_failed(f"Error transcribing audio: {audio_path.name} is garbled")
+    output_path.write_text(f"transcript of {audio_path.name}")
+    return True
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """A service with a 0.5 s idle timeout listening on a socket in `tmp_path`"""
+    monkeypatch.setattr(audio_to_text, "transcribe_audio", stub_transcribe)
+    monkeypatch.setattr(audio_to_text, "whisper_model", None)
+    monkeypatch.setattr(audio_to_text, "SOCKET_PATH", str(tmp_path / "d.sock"))
+    service = transcribe_daemon.TranscriptionService(idle_timeout=0.5)
+    server = transcribe_daemon.TranscriptionServer(audio_to_text.SOCKET_PATH, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def transcribe(tmp_path, name):
+    return daemon_request(
+        {"op": "transcribe", "input": str(tmp_path / name), "output": str(tmp_path / f"{name}.md"), "id": audio_to_text.whisper_id()}
+    )
+
+
+def test_concurrent_jobs_are_answered_and_counted(tmp_path, daemon):
+    names = ["a.wav", "bad.wav", "c.wav", "d.wav"]
+    replies = {}
+    clients = [threading.Thread(target=lambda n=n: replies.update({n: transcribe(tmp_path, n)})) for n in names]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join(10)
+
+    assert {n: r["ok"] for n, r in replies.items()} == {"a.wav": True, "bad.wav": False, "c.wav": True, "d.wav": True}
+    assert replies["bad.wav"]["error"] == "Error transcribing audio: bad.wav is garbled"
+    # One model, one job at a time: someone waited for the other three
+    assert max(r["waited"] for r in replies.values()) >= 0.25
+    assert (tmp_path / "c.wav.md").read_text() == "transcript of c.wav"
+
+    status = daemon_request({"op": "status"})
+    assert status["ok"] and status["id"] == audio_to_text.whisper_id()
+    assert (status["completed"], status["failed"], status["queue_depth"], status["running"]) == (3, 1, 0, None)
+    assert status["model_loaded"]
+    assert status["busy_seconds"] >= 0.4
+    assert status["mean_latency"] >= 0.1
+
+
+def test_model_is_unloaded_when_idle(tmp_path, daemon):
+    assert transcribe(tmp_path, "a.wav")["ok"]
+    assert daemon_request({"op": "status"})["model_loaded"]
+    time.sleep(1.2)
+    assert not daemon_request({"op": "status"})["model_loaded"]
+    # The next job loads it again
+    assert transcribe(tmp_path, "b.wav")["ok"]
+    assert daemon_request({"op": "status"})["model_loaded"]
+
+
+def test_one_reply_line_per_request_line(daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(audio_to_text.SOCKET_PATH)
+        with sock.makefile("rwb") as stream:
+            stream.write(b'{"op": "status"}\nnot json\n{"op": "launch"}\n')
+            stream.flush()
+            replies = [json.loads(stream.readline()) for _ in range(3)]
+    assert replies[0]["ok"] and replies[0]["completed"] == 0
+    assert not replies[1]["ok"] and replies[1]["error"].startswith("Bad request")
+    assert replies[2] == {"ok": False, "error": "Unknown operation: 'launch'"}
+
+
+def test_status_command(tmp_path, daemon, capsys):
+    assert transcribe_daemon.print_status(audio_to_text.SOCKET_PATH) == 0
+    assert "- Latency: no jobs yet" in capsys.readouterr().out
+    transcribe(tmp_path, "a.wav")
+    assert transcribe_daemon.print_status(audio_to_text.SOCKET_PATH) == 0
+    out = capsys.readouterr().out
+    assert "- Jobs: 1 done, 0 failed" in out
+    assert "(loaded)" in out
+    assert transcribe_daemon.print_status(str(tmp_path / "none.sock")) == 1
+
+
+def test_client_transcribes_itself_when_the_daemon_settings_differ(tmp_path, daemon, monkeypatch, capsys):
+    client_id = audio_to_text.whisper_id()
+    in_process = []
+    monkeypatch.setattr(audio_to_text, "transcribe_audio", lambda audio, output: in_process.append(audio) or True)
+    # The daemon's threads see other settings than this (main) thread
+    monkeypatch.setattr(
+        audio_to_text, "whisper_id", lambda: client_id if threading.current_thread() is threading.main_thread() else "other"
+    )
+    assert audio_to_text.transcribe_file(tmp_path / "a.wav", tmp_path / "a.md")
+    assert in_process == [tmp_path / "a.wav"]
+    assert "Transcription daemon runs other, transcribing here" in capsys.readouterr().out
+    assert daemon_request({"op": "status"})["completed"] == 0
@@ -0,0 +1,146 @@
+"""Tests for the key point extraction behind `daksh vision`."""
+
+import json
+from pathlib import Path as P
+
+from typer.testing import CliRunner
+
+from daksh import cli
+from daksh.vision import (
+    CACHE_FILE,
+    create_vision_md,
+    extract_incremental,
+    extract_key_points,
+    keyword_matcher,
+)
+
+CORPUS = {
+    "meetings.md": """# Meeting notes
+
+As a project manager, I want reminders. As an admin As a team lead, I review.
+The main problem is that follow-ups get lost between meetings.
+This is not a problem we should solve in this release at all.
+Our KPI is adoption; we aim to increase usage by 40% this quarter.
+Success means meeting outcomes are recorded for 90% of meetings.
+The goal is a calmer week for everyone on the team.
+Out of scope: we will not build billing; billing is a limit of v1.
+The scope covers tasks, meetings and the dashboard views.
+Note the tissue of issues in the backlog needs grooming soon.
+Our unique advantage is context-aware task creation from entities.
+
+REQ-12 Smart assistant creates tasks from chat messages
+TASK-3 short
+MEET-7   Meetings link to clients, projects and opportunities
+""",
+    "features.md": """## Features
+
+- Feature: calendar sync with Outlook and Google calendars
+- Feature: calendar sync with Outlook and Google calendars
+- The reporting component shows overdue tasks per team member
+short feature
+- A capability that is described at great length """ + "x" * 200 + """
+A competitive differentiator is the AI suggestion engine for agendas.
+Reduce the time to schedule a meeting with the smart assistant function.
+\tThe challenge: users shouldn't need to re-enter the same details.\r
+As an enterprise user, I want a single task inbox.
+""",
+}
+
+# What the line-by-line keyword scan extracted from CORPUS
+GOLDEN = {
+    "problems": ["The main problem is that follow-ups get lost between meetings."],
+    "features": [
+        "- Feature: calendar sync with Outlook and Google calendars",
+        "- The reporting component shows overdue tasks per team member",
+        "Reduce the time to schedule a meeting with the smart assistant function.",
+    ],
+    "user_types": ["enterprise user", "project manager", "team lead"],
+    "requirements": [
+        "Meetings link to clients, projects and opportunities",
+        "Smart assistant creates tasks from chat messages",
+    ],
+    "goals": ["Success means meeting outcomes are recorded for 90% of meetings."],
+    "scope": {
+        "in": ["The scope covers tasks, meetings and the dashboard views."],
+        "out": ["Out of scope: we will not build billing; billing is a limit of v1."],
+    },
+    "differentiators": [
+        "A competitive differentiator is the AI suggestion engine for agendas.",
+        "Our unique advantage is context-aware task creation from entities.",
+    ],
+}
+
+
+def write_corpus(root, copies=1):
+    for i in range(copies):
+        for name, text in CORPUS.items():
+            (root / f"{i}-{name}").write_text(text, encoding="utf-8")
+    return sorted(str(p) for p in root.iterdir())
+
+
+def test_extract_key_points_matches_golden(tmp_path):
+    data = extract_key_points(write_corpus(tmp_path), jobs=1)
+    data["user_types"] = sorted(data["user_types"])
+    assert len(data["features"]) == len(set(data["features"]))
+    assert {k: sorted(v) if isinstance(v, list) else v for k, v in data.items()} == GOLDEN
+
+
+def test_extract_key_points_same_for_any_worker_count(tmp_path):
+    files = write_corpus(tmp_path, copies=5)
+    serial = extract_key_points(files, jobs=1)
+    assert extract_key_points(files, jobs=3) == serial
+    assert serial["user_types"] == ["enterprise user", "project manager", "team lead"]
+
+
+def test_keyword_matcher_reports_overlapping_keywords():
+    match = keyword_matcher({"a": ["not"], "b": ["note"], "c": ["tea"]})
+    assert match("a noteam") == {"a", "b", "c"}
+    assert match("no tea") == {"c"}
+    assert match("NOTE") == set()
+
+
+def test_incremental_rescans_only_changed_files(tmp_path):
+    files = write_corpus(tmp_path, copies=3)
+    cache = tmp_path / CACHE_FILE
+    _, counts = extract_incremental(tmp_path, [P(f) for f in files], cache)
+    assert counts == {"reused": 0, "scanned": 6, "dropped": 0}
+
+    (tmp_path / "1-meetings.md").write_text("The problem is that nobody reads the minutes.")
+    (tmp_path / "2-features.md").unlink()
+    (tmp_path / "0-features.md").touch()
+    files = sorted(tmp_path.glob("*.md"))
+    data, counts = extract_incremental(tmp_path, files, cache)
+    assert counts == {"reused": 4, "scanned": 1, "dropped": 1}
+    assert data == extract_key_points(files, jobs=1)
+    assert len(json.loads(cache.read_text())["files"]) == 5
+
+
+def test_vision_command(tmp_path):
+    (tmp_path / "converted").mkdir()
+    write_corpus(tmp_path / "converted")
+    output = tmp_path / "vision.md"
+    for _ in range(2):
+        result = CliRunner().invoke(cli, ["vision", str(tmp_path / "converted"), "-o", str(output)])
+        assert result.exit_code == 0, result.output
+    assert "Scanned 0 files, reused 2 from the cache" in result.output
+    assert "- The main problem is that follow-ups get lost between meetings." in output.read_text()
+
+
+def test_pipeline_streams_documents_into_the_vision(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    write_corpus(source)
+    (source / "0-meetings.txt").write_text(CORPUS["meetings.md"])
+    (source / "deck.pdf").write_bytes(b"%PDF-1.4")
+    output = tmp_path / "vision.md"
+    markdown = tmp_path / "markdown"
+    args = ["pipeline", str(source), "-o", str(output), "--markdown-dir", str(markdown), "--jobs", "2"]
+    result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    assert "3 documents converted" in result.output
+    assert sorted(p.name for p in markdown.iterdir()) == ["0-features.md", "0-meetings.md.md", "0-meetings.txt.md"]
+
+    # the same vision as extracting the written markdown afterwards
+    expected = tmp_path / "expected.md"
+    create_vision_md(extract_key_points(sorted(markdown.iterdir()), jobs=1), expected)
+    assert output.read_text() == expected.read_text()
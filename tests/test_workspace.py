@@ -0,0 +1,40 @@
+"""Tests for `daksh update-prompts --workspace`."""
+
+from daksh.workspace import find_repos, update_workspace
+from daksh.update_prompts import resolve_assets_dir
+
+
+def make_workspace(root):
+    for repo in ["svc-a", "team/svc-b", "node_modules/dep", "svc-a/vendor/lib"]:
+        (root / repo / ".git").mkdir(parents=True)
+    (root / "team" / "notes").mkdir()
+    return root
+
+
+def test_find_repos_skips_nested_and_vendored(tmp_path):
+    root = make_workspace(tmp_path)
+    assert find_repos(root) == [root / "svc-a", root / "team" / "svc-b"]
+
+
+def test_update_workspace_updates_every_repo(tmp_path):
+    root = make_workspace(tmp_path)
+    (root / "svc-a" / ".github").mkdir()
+    (root / "svc-a" / ".github" / "copilot-instructions.md").write_text("mine")
+
+    results = update_workspace(resolve_assets_dir(), root, jobs=2)
+    assert [r["error"] for r in results] == [None, None]
+    assert all(r["added"] > 0 for r in results)
+    assert (root / "team" / "svc-b" / ".daksh" / ".manifest.json").exists()
+    # the backup prompt is never shown in batch mode
+    assert list((root / "svc-a" / ".github").glob("*.bak.*")) == []
+
+
+def test_update_workspace_prints_the_output_of_failed_repos(tmp_path, capsys):
+    root = make_workspace(tmp_path)
+    (root / "team" / "svc-b" / ".vscode" / "settings.json").mkdir(parents=True)
+
+    results = update_workspace(resolve_assets_dir(), root, jobs=2)
+    assert [r["error"] is None for r in results] == [True, False]
+    summary = capsys.readouterr().out.split("Repository", 1)[1]
+    assert "--- team/svc-b ---" in summary
+    assert "--- svc-a ---" not in summary